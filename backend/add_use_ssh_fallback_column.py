@@ -2,6 +2,9 @@
 import sqlite3
 import os
 
+# PRAGMA user_version written once this script's migration has been applied
+SCHEMA_VERSION = 1
+
 # Get the database path - it's in the same directory as this script
 db_path = os.path.join(os.path.dirname(__file__), 'mactraker.db')
 print(f"Database path: {db_path}")
@@ -9,19 +12,33 @@ print(f"Database path: {db_path}")
 conn = sqlite3.connect(db_path)
 cursor = conn.cursor()
 
-# Check if column exists
-cursor.execute("PRAGMA table_info(switches)")
-columns = cursor.fetchall()
-column_names = [col[1] for col in columns]
+# Same pragmas as the application engine; journal_mode=WAL persists in the file
+cursor.execute("PRAGMA journal_mode=WAL")
+cursor.execute("PRAGMA synchronous=NORMAL")
+cursor.execute("PRAGMA mmap_size=268435456")
 
-print(f"Existing columns: {column_names}")
+# Fast path: a single integer read, no table scan
+user_version = cursor.execute("PRAGMA user_version").fetchone()[0]
 
-if 'use_ssh_fallback' not in column_names:
-    print("Adding use_ssh_fallback column...")
-    cursor.execute("ALTER TABLE switches ADD COLUMN use_ssh_fallback BOOLEAN DEFAULT 0")
-    conn.commit()
-    print("Column added successfully!")
-else:
+if user_version >= SCHEMA_VERSION:
     print("Column already exists.")
+else:
+    # Check, ALTER and version bump in one transaction (rolled back on error)
+    with conn:
+        cursor.execute("BEGIN")
+
+        cursor.execute("PRAGMA table_info(switches)")
+        column_names = [col[1] for col in cursor.fetchall()]
+
+        print(f"Existing columns: {column_names}")
+
+        if 'use_ssh_fallback' not in column_names:
+            print("Adding use_ssh_fallback column...")
+            cursor.execute("ALTER TABLE switches ADD COLUMN use_ssh_fallback BOOLEAN DEFAULT 0")
+            print("Column added successfully!")
+        else:
+            print("Column already exists.")
+
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
 conn.close()
@@ -1,16 +1,30 @@
 """Alert Rules and Webhooks API endpoints."""
-import json
 from datetime import datetime
 from typing import Optional, List
 
+import httpx
+import orjson
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
 from app.db.models import AlertRule, Webhook
+from app.utils.orjson_response import ORJSONResponse
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Shared client so webhook calls reuse keep-alive connections (closed on app shutdown)
+_WEBHOOK_CLIENT = httpx.AsyncClient(
+    timeout=10.0,
+    limits=httpx.Limits(max_keepalive_connections=32),
+)
+
+
+async def close_webhook_client():
+    """Close the shared webhook HTTP client."""
+    await _WEBHOOK_CLIENT.aclose()
 
 
 # === Alert Rule Schemas ===
@@ -88,22 +102,19 @@ def list_alert_rules(db: Session = Depends(get_db)):
     rules = db.query(AlertRule).order_by(AlertRule.created_at.desc()).all()
     result = []
     for rule in rules:
-        try:
-            conditions = json.loads(rule.conditions)
-        except:
-            conditions = {}
-        result.append(AlertRuleResponse(
-            id=rule.id,
-            name=rule.name,
-            description=rule.description,
-            rule_type=rule.rule_type,
-            conditions=conditions,
-            alert_severity=rule.alert_severity,
-            is_enabled=rule.is_enabled,
-            created_at=rule.created_at,
-            updated_at=rule.updated_at
-        ))
-    return result
+        result.append({
+            "id": rule.id,
+            "name": rule.name,
+            "description": rule.description,
+            "rule_type": rule.rule_type,
+            "conditions": rule.conditions,
+            "alert_severity": rule.alert_severity,
+            "is_enabled": rule.is_enabled,
+            "created_at": rule.created_at,
+            "updated_at": rule.updated_at,
+        })
+    # Returned as a Response so FastAPI skips response_model re-validation
+    return ORJSONResponse(result)
 
 
 @router.post("/rules", response_model=AlertRuleResponse)
@@ -113,14 +124,14 @@ def create_alert_rule(rule: AlertRuleCreate, db: Session = Depends(get_db)):
         name=rule.name,
         description=rule.description,
         rule_type=rule.rule_type,
-        conditions=json.dumps(rule.conditions),
+        conditions=rule.conditions,
         alert_severity=rule.alert_severity,
         is_enabled=rule.is_enabled
     )
     db.add(new_rule)
     db.commit()
     db.refresh(new_rule)
-    return AlertRuleResponse(
+    return AlertRuleResponse.model_construct(
         id=new_rule.id,
         name=new_rule.name,
         description=new_rule.description,
@@ -147,7 +158,7 @@ def update_alert_rule(rule_id: int, rule: AlertRuleUpdate, db: Session = Depends
     if rule.rule_type is not None:
         existing.rule_type = rule.rule_type
     if rule.conditions is not None:
-        existing.conditions = json.dumps(rule.conditions)
+        existing.conditions = rule.conditions
     if rule.alert_severity is not None:
         existing.alert_severity = rule.alert_severity
     if rule.is_enabled is not None:
@@ -156,17 +167,12 @@ def update_alert_rule(rule_id: int, rule: AlertRuleUpdate, db: Session = Depends
     db.commit()
     db.refresh(existing)
 
-    try:
-        conditions = json.loads(existing.conditions)
-    except:
-        conditions = {}
-
-    return AlertRuleResponse(
+    return AlertRuleResponse.model_construct(
         id=existing.id,
         name=existing.name,
         description=existing.description,
         rule_type=existing.rule_type,
-        conditions=conditions,
+        conditions=existing.conditions,
         alert_severity=existing.alert_severity,
         is_enabled=existing.is_enabled,
         created_at=existing.created_at,
@@ -192,22 +198,18 @@ def list_webhooks(db: Session = Depends(get_db)):
     webhooks = db.query(Webhook).order_by(Webhook.created_at.desc()).all()
     result = []
     for wh in webhooks:
-        try:
-            alert_types = json.loads(wh.alert_types) if wh.alert_types != "all" else ["all"]
-        except:
-            alert_types = ["all"]
-        result.append(WebhookResponse(
-            id=wh.id,
-            name=wh.name,
-            url=wh.url,
-            webhook_type=wh.webhook_type,
-            alert_types=alert_types,
-            is_enabled=wh.is_enabled,
-            last_triggered=wh.last_triggered,
-            last_status=wh.last_status,
-            created_at=wh.created_at
-        ))
-    return result
+        result.append({
+            "id": wh.id,
+            "name": wh.name,
+            "url": wh.url,
+            "webhook_type": wh.webhook_type,
+            "alert_types": wh.alert_types,
+            "is_enabled": wh.is_enabled,
+            "last_triggered": wh.last_triggered,
+            "last_status": wh.last_status,
+            "created_at": wh.created_at,
+        })
+    return ORJSONResponse(result)
 
 
 @router.post("/webhooks", response_model=WebhookResponse)
@@ -218,13 +220,13 @@ def create_webhook(webhook: WebhookCreate, db: Session = Depends(get_db)):
         url=webhook.url,
         webhook_type=webhook.webhook_type,
         secret_token=webhook.secret_token,
-        alert_types=json.dumps(webhook.alert_types) if webhook.alert_types != ["all"] else "all",
+        alert_types=webhook.alert_types,
         is_enabled=webhook.is_enabled
     )
     db.add(new_wh)
     db.commit()
     db.refresh(new_wh)
-    return WebhookResponse(
+    return WebhookResponse.model_construct(
         id=new_wh.id,
         name=new_wh.name,
         url=new_wh.url,
@@ -253,24 +255,19 @@ def update_webhook(webhook_id: int, webhook: WebhookUpdate, db: Session = Depend
     if webhook.secret_token is not None:
         existing.secret_token = webhook.secret_token
     if webhook.alert_types is not None:
-        existing.alert_types = json.dumps(webhook.alert_types) if webhook.alert_types != ["all"] else "all"
+        existing.alert_types = webhook.alert_types
     if webhook.is_enabled is not None:
         existing.is_enabled = webhook.is_enabled
 
     db.commit()
     db.refresh(existing)
 
-    try:
-        alert_types = json.loads(existing.alert_types) if existing.alert_types != "all" else ["all"]
-    except:
-        alert_types = ["all"]
-
-    return WebhookResponse(
+    return WebhookResponse.model_construct(
         id=existing.id,
         name=existing.name,
         url=existing.url,
         webhook_type=existing.webhook_type,
-        alert_types=alert_types,
+        alert_types=existing.alert_types,
         is_enabled=existing.is_enabled,
         last_triggered=existing.last_triggered,
         last_status=existing.last_status,
@@ -289,42 +286,53 @@ def delete_webhook(webhook_id: int, db: Session = Depends(get_db)):
     return {"message": "Webhook deleted", "id": webhook_id}
 
 
+# Static test payloads (read-only, shared across calls)
+_SLACK_TEST_PAYLOAD = {
+    "text": "🔔 *Mac-Traker Test Alert*\nThis is a test notification from Mac-Traker.",
+    "attachments": [{
+        "color": "#36a64f",
+        "fields": [{
+            "title": "Test",
+            "value": "Webhook configuration is working correctly",
+            "short": False
+        }]
+    }]
+}
+
+_TEAMS_TEST_PAYLOAD = {
+    "@type": "MessageCard",
+    "@context": "http://schema.org/extensions",
+    "themeColor": "0076D7",
+    "summary": "Mac-Traker Test Alert",
+    "sections": [{
+        "activityTitle": "🔔 Mac-Traker Test Alert",
+        "facts": [{
+            "name": "Status",
+            "value": "Test successful"
+        }]
+    }]
+}
+
+
+def _record_webhook_status(db: Session, wh: Webhook, status: str):
+    wh.last_triggered = datetime.utcnow()
+    wh.last_status = status
+    db.commit()
+
+
 @router.post("/webhooks/{webhook_id}/test")
-def test_webhook(webhook_id: int, db: Session = Depends(get_db)):
+async def test_webhook(webhook_id: int, db: Session = Depends(get_db)):
     """Test a webhook by sending a test payload."""
-    import httpx
-
-    wh = db.query(Webhook).filter(Webhook.id == webhook_id).first()
+    # Database work runs in the threadpool; only the HTTP call stays on the loop
+    wh = await run_in_threadpool(db.get, Webhook, webhook_id)
     if not wh:
         raise HTTPException(status_code=404, detail="Webhook not found")
 
     # Build test payload based on type
     if wh.webhook_type == "slack":
-        payload = {
-            "text": "🔔 *Mac-Traker Test Alert*\nThis is a test notification from Mac-Traker.",
-            "attachments": [{
-                "color": "#36a64f",
-                "fields": [{
-                    "title": "Test",
-                    "value": "Webhook configuration is working correctly",
-                    "short": False
-                }]
-            }]
-        }
+        payload = _SLACK_TEST_PAYLOAD
     elif wh.webhook_type == "teams":
-        payload = {
-            "@type": "MessageCard",
-            "@context": "http://schema.org/extensions",
-            "themeColor": "0076D7",
-            "summary": "Mac-Traker Test Alert",
-            "sections": [{
-                "activityTitle": "🔔 Mac-Traker Test Alert",
-                "facts": [{
-                    "name": "Status",
-                    "value": "Test successful"
-                }]
-            }]
-        }
+        payload = _TEAMS_TEST_PAYLOAD
     else:
         payload = {
             "event": "test",
@@ -334,17 +342,15 @@ def test_webhook(webhook_id: int, db: Session = Depends(get_db)):
         }
 
     try:
-        with httpx.Client(timeout=10.0) as client:
-            response = client.post(wh.url, json=payload)
-            response.raise_for_status()
-
-        wh.last_triggered = datetime.utcnow()
-        wh.last_status = "success"
-        db.commit()
-
-        return {"status": "success", "message": "Test notification sent"}
+        response = await _WEBHOOK_CLIENT.post(
+            wh.url,
+            content=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
     except Exception as e:
-        wh.last_triggered = datetime.utcnow()
-        wh.last_status = f"error: {str(e)[:100]}"
-        db.commit()
+        await run_in_threadpool(_record_webhook_status, db, wh, f"error: {str(e)[:100]}")
         raise HTTPException(status_code=500, detail=f"Webhook test failed: {str(e)}")
+
+    await run_in_threadpool(_record_webhook_status, db, wh, "success")
+    return {"status": "success", "message": "Test notification sent"}
@@ -1,15 +1,38 @@
 """Alerts API endpoints."""
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime, time
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import func, tuple_
 
 from app.db.database import get_db
 from app.db.models import Alert, MacAddress, Switch, Port, MacHistory
-from app.api.schemas import AlertResponse, AlertListResponse
+from app.api.schemas import AlertListResponse
+from app.utils.orjson_response import ORJSONResponse
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Columns needed to build an AlertResponse; list queries load only these
+_ALERT_LIST_COLUMNS = load_only(
+    Alert.id,
+    Alert.alert_type,
+    Alert.message,
+    Alert.severity,
+    Alert.is_read,
+    Alert.created_at,
+)
+
+
+def _alert_to_dict(alert: Alert) -> dict:
+    """Build the AlertResponse payload for an alert row."""
+    return {
+        "id": alert.id,
+        "alert_type": alert.alert_type,
+        "message": alert.message,
+        "severity": alert.severity,
+        "is_read": alert.is_read,
+        "created_at": alert.created_at,
+    }
 
 
 @router.get("", response_model=AlertListResponse)
@@ -20,6 +43,8 @@ def list_alerts(
     is_read: Optional[bool] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
+    after_created_at: Optional[datetime] = None,
+    after_id: Optional[int] = None,
     db: Session = Depends(get_db),
 ):
     """List all alerts with optional filtering.
@@ -27,8 +52,19 @@ def list_alerts(
     Args:
         date_from: Filter alerts from this date (ISO format YYYY-MM-DD)
         date_to: Filter alerts until this date (ISO format YYYY-MM-DD)
+        after_created_at: Keyset cursor, pass back next_cursor from the previous page
+        after_id: Keyset cursor, pass back next_cursor from the previous page
     """
-    query = db.query(Alert)
+    use_cursor = after_created_at is not None or after_id is not None
+    if use_cursor and (after_created_at is None or after_id is None):
+        raise HTTPException(
+            status_code=422, detail="Il cursore richiede sia after_created_at che after_id"
+        )
+    if use_cursor and skip:
+        # The cursor already positions the page; an OFFSET would skip again
+        raise HTTPException(status_code=422, detail="skip non e' ammesso insieme al cursore")
+
+    query = db.query(Alert).options(_ALERT_LIST_COLUMNS)
 
     if alert_type:
         query = query.filter(Alert.alert_type == alert_type)
@@ -39,30 +75,67 @@ def list_alerts(
     # Date range filtering
     if date_from:
         try:
-            from_date = datetime.strptime(date_from, "%Y-%m-%d")
+            from_date = datetime.fromisoformat(date_from)
             query = query.filter(Alert.created_at >= from_date)
         except ValueError:
             pass  # Ignore invalid date format
 
     if date_to:
         try:
-            # Add 1 day to include the entire end date
-            to_date = datetime.strptime(date_to, "%Y-%m-%d")
-            to_date = to_date.replace(hour=23, minute=59, second=59)
+            # End of day to include the entire end date
+            to_date = datetime.combine(date.fromisoformat(date_to), time.max)
             query = query.filter(Alert.created_at <= to_date)
         except ValueError:
             pass  # Ignore invalid date format
 
-    total = query.count()
-    unread_count = db.query(func.count(Alert.id)).filter(Alert.is_read == False).scalar() or 0
+    # Fetch the page, the filtered total and the global unread count in a
+    # single round-trip: COUNT(*) OVER () is evaluated before LIMIT/OFFSET.
+    page_query = query
+    total_expr = func.count().over()
+    if use_cursor:
+        # Keyset pagination: seek past the cursor on (created_at, id) instead
+        # of scanning OFFSET rows. The total still covers the whole filter.
+        page_query = query.filter(
+            tuple_(Alert.created_at, Alert.id) < (after_created_at, after_id)
+        )
+        total_expr = query.with_entities(func.count(Alert.id)).scalar_subquery()
+
+    unread_subq = (
+        db.query(func.count(Alert.id)).filter(Alert.is_read == False).scalar_subquery()
+    )
+    rows = (
+        page_query.add_columns(
+            total_expr.label("total"),
+            unread_subq.label("unread_count"),
+        )
+        .order_by(Alert.created_at.desc(), Alert.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
 
-    alerts = query.order_by(Alert.created_at.desc()).offset(skip).limit(limit).all()
+    if rows:
+        total = rows[0].total
+        unread_count = rows[0].unread_count or 0
+    else:
+        # Page past the end: no row to carry the window values
+        total = query.count()
+        unread_count = db.query(func.count(Alert.id)).filter(Alert.is_read == False).scalar() or 0
 
-    return AlertListResponse(
-        items=[AlertResponse.model_validate(a) for a in alerts],
-        total=total,
-        unread_count=unread_count,
-    )
+    alerts = [row[0] for row in rows]
+
+    next_cursor = None
+    if len(alerts) == limit:
+        last = alerts[-1]
+        next_cursor = {"after_created_at": last.created_at, "after_id": last.id}
+
+    # Returned as a Response so FastAPI skips response_model re-validation
+    return ORJSONResponse({
+        "items": [_alert_to_dict(a) for a in alerts],
+        "total": total,
+        "unread_count": unread_count,
+        "next_cursor": next_cursor,
+    })
 
 
 @router.get("/unread", response_model=AlertListResponse)
@@ -71,16 +144,16 @@ def list_unread_alerts(
     db: Session = Depends(get_db),
 ):
     """List unread alerts."""
-    query = db.query(Alert).filter(Alert.is_read == False)
+    query = db.query(Alert).options(_ALERT_LIST_COLUMNS).filter(Alert.is_read == False)
 
     total = query.count()
     alerts = query.order_by(Alert.created_at.desc()).limit(limit).all()
 
-    return AlertListResponse(
-        items=[AlertResponse.model_validate(a) for a in alerts],
-        total=total,
-        unread_count=total,
-    )
+    return ORJSONResponse({
+        "items": [_alert_to_dict(a) for a in alerts],
+        "total": total,
+        "unread_count": total,
+    })
 
 
 @router.put("/{alert_id}/read")
@@ -99,7 +172,9 @@ def mark_alert_read(alert_id: int, db: Session = Depends(get_db)):
 @router.put("/read-all")
 def mark_all_alerts_read(db: Session = Depends(get_db)):
     """Mark all alerts as read."""
-    db.query(Alert).filter(Alert.is_read == False).update({"is_read": True})
+    db.query(Alert).filter(Alert.is_read == False).update(
+        {Alert.is_read: True}, synchronize_session=False
+    )
     db.commit()
 
     return {"message": "Tutti gli alert marcati come letti"}
@@ -125,11 +200,15 @@ def create_mac_move_alert_test(
     if not mac:
         raise HTTPException(status_code=404, detail="MAC non trovato")
 
-    # Get switches and ports
-    old_switch = db.query(Switch).filter(Switch.id == old_switch_id).first()
-    old_port = db.query(Port).filter(Port.id == old_port_id).first()
-    new_switch = db.query(Switch).filter(Switch.id == new_switch_id).first()
-    new_port = db.query(Port).filter(Port.id == new_port_id).first()
+    # Get switches and ports (one query per table)
+    switches = {
+        s.id: s for s in db.query(Switch).filter(Switch.id.in_([old_switch_id, new_switch_id]))
+    }
+    ports = {p.id: p for p in db.query(Port).filter(Port.id.in_([old_port_id, new_port_id]))}
+    old_switch = switches.get(old_switch_id)
+    old_port = ports.get(old_port_id)
+    new_switch = switches.get(new_switch_id)
+    new_port = ports.get(new_port_id)
 
     if not all([old_switch, old_port, new_switch, new_port]):
         raise HTTPException(status_code=404, detail="Switch o porta non trovati")
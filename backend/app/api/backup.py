@@ -9,9 +9,10 @@ from pydantic import BaseModel
 
 from app.services.backup.backup_service import get_backup_service
 from app.services.backup.backup_scheduler import get_backup_scheduler
+from app.utils.orjson_response import ORJSONResponse, orjson_array_stream
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
 # Pydantic schemas
@@ -65,7 +66,9 @@ class SchedulerStatus(BaseModel):
 async def list_backups():
     """List all available backups."""
     backup_service = get_backup_service()
-    return backup_service.list_backups()
+    # Streamed element by element; returning a Response also skips
+    # FastAPI's response_model re-validation
+    return orjson_array_stream(backup_service.list_backups())
 
 
 @router.post("/create", response_model=BackupResult)
@@ -9,9 +9,10 @@ from pydantic import BaseModel
 
 from app.services.cleanup.history_cleanup_service import get_history_cleanup_service
 from app.services.cleanup.cleanup_scheduler import get_cleanup_scheduler
+from app.utils.orjson_response import ORJSONResponse
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
 # Pydantic schemas
@@ -1,19 +1,129 @@
 """Dashboard API endpoints."""
+import logging
+import threading
 from datetime import datetime, timedelta
+from typing import Optional
+
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import func, case
 
 from app.db.database import get_db
-from app.db.models import MacAddress, Switch, Alert, DiscoveryLog
+from app.db.models import (
+    Alert,
+    DiscoveryLog,
+    MacAddress,
+    MacHistoryDaily,
+    Switch,
+    SwitchMacSummary,
+)
+from app.api.graph import clear_sim_cache
 from app.api.schemas import DashboardStats
+from app.utils.mac_utils import MAC_CLASS_MULTICAST, MAC_CLASS_RANDOM, MAC_CLASS_REAL
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Short-lived cache for the dashboard widgets. The underlying data only changes
+# when MAC data is ingested, which clears it (see refresh_mac_rollups).
+stats_cache: TTLCache = TTLCache(maxsize=16, ttl=10)
+_stats_cache_lock = threading.Lock()
+
+# Seconds to wait for further writes before a scheduled rollup refresh runs
+ROLLUP_REFRESH_DEBOUNCE_SECONDS = 2.0
+# Pending debounced refresh (see schedule_mac_rollups_refresh)
+_rollup_refresh_timer: Optional[threading.Timer] = None
+_rollup_refresh_lock = threading.Lock()
+
+
+def _cache_get(key):
+    with _stats_cache_lock:
+        return stats_cache.get(key)
+
+
+def _cache_set(key, value):
+    with _stats_cache_lock:
+        stats_cache[key] = value
+    return value
+
+
+def _ensure_switch_summary(db: Session):
+    """Build the per-switch MAC summary if no discovery has populated it yet."""
+    if db.query(SwitchMacSummary.switch_id).first() is None:
+        from app.services.discovery.mac_processor import MacProcessor
+        MacProcessor(db).refresh_switch_summary()
+
+
+def _ensure_history_rollup(db: Session):
+    """Build the daily MAC history rollup if no discovery has populated it yet."""
+    if db.query(MacHistoryDaily.day).first() is None:
+        from app.services.discovery.mac_processor import MacProcessor
+        MacProcessor(db).refresh_history_rollup()
+
+
+def clear_stats_cache():
+    """Drop all cached dashboard responses."""
+    with _stats_cache_lock:
+        stats_cache.clear()
+
+
+def refresh_mac_rollups(db: Session):
+    """
+    Post-ingest hook: rebuild the per-switch MAC summary and the daily MAC
+    history rollup and drop the cached dashboard responses and path
+    simulations. Call after anything that writes MAC locations or history.
+    """
+    from app.services.discovery.mac_processor import MacProcessor
+    mac_processor = MacProcessor(db)
+    mac_processor.refresh_switch_summary()
+    mac_processor.refresh_history_rollup()
+    clear_stats_cache()
+    clear_sim_cache()
+
+
+def schedule_mac_rollups_refresh(delay: float = ROLLUP_REFRESH_DEBOUNCE_SECONDS):
+    """
+    Run refresh_mac_rollups in the background once writes settle.
+
+    Each call restarts the countdown, so a burst of single-switch discoveries
+    results in a single refresh. The refresh uses its own database session.
+    """
+    global _rollup_refresh_timer
+    with _rollup_refresh_lock:
+        if _rollup_refresh_timer is not None:
+            _rollup_refresh_timer.cancel()
+        timer = threading.Timer(delay, _run_scheduled_rollup_refresh)
+        timer.daemon = True
+        _rollup_refresh_timer = timer
+        timer.start()
+
+
+def _run_scheduled_rollup_refresh():
+    global _rollup_refresh_timer
+    from app.db.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        refresh_mac_rollups(db)
+    except Exception as e:
+        logger.error(f"Scheduled MAC rollup refresh failed: {e}")
+    finally:
+        db.close()
+        with _rollup_refresh_lock:
+            # Keep a newer timer scheduled while this refresh was running
+            if _rollup_refresh_timer is threading.current_thread():
+                _rollup_refresh_timer = None
+
 
 @router.get("/stats", response_model=DashboardStats)
 def get_dashboard_stats(db: Session = Depends(get_db)):
     """Get dashboard statistics."""
+    cached = _cache_get("stats")
+    if cached is not None:
+        return cached
+
     # Count active MACs
     mac_count = db.query(func.count(MacAddress.id)).filter(
         MacAddress.is_active == True
@@ -30,55 +140,44 @@ def get_dashboard_stats(db: Session = Depends(get_db)):
     ).scalar() or 0
 
     # Get last discovery timestamp
-    last_log = db.query(DiscoveryLog).filter(
+    last_discovery = db.query(DiscoveryLog.completed_at).filter(
         DiscoveryLog.status == "success"
-    ).order_by(DiscoveryLog.completed_at.desc()).first()
-
-    last_discovery = last_log.completed_at if last_log else None
+    ).order_by(DiscoveryLog.completed_at.desc()).limit(1).scalar()
 
-    return DashboardStats(
+    return _cache_set("stats", DashboardStats(
         mac_count=mac_count,
         switch_count=switch_count,
         alert_count=alert_count,
         last_discovery=last_discovery,
-    )
+    ))
 
 
 @router.get("/mac-breakdown")
 def get_mac_breakdown(db: Session = Depends(get_db)):
     """Get MAC count breakdown by type: real (globally unique), random (locally administered), multicast."""
-    # Locally Administered bit = second hex char in {2,3,6,7,A,B,E,F,a,b,e,f}
-    # We use substr on mac_address field (format: XX:XX:XX:XX:XX:XX)
-    la_chars = ('2', '3', '6', '7', 'A', 'B', 'E', 'F', 'a', 'b', 'e', 'f')
-
-    total = db.query(func.count(MacAddress.id)).filter(
-        MacAddress.is_active == True
-    ).scalar() or 0
+    cached = _cache_get("mac-breakdown")
+    if cached is not None:
+        return cached
 
-    # Multicast MACs (first byte odd = bit 0 set, or well-known prefixes)
-    multicast = db.query(func.count(MacAddress.id)).filter(
-        MacAddress.is_active == True,
-        MacAddress.mac_address.op('LIKE')('01:%')
-        | MacAddress.mac_address.op('LIKE')('33:33:%')
-        | MacAddress.mac_address.op('LIKE')('FF:FF:FF%')
-        | MacAddress.mac_address.op('LIKE')('01:00:5E%')
-        | MacAddress.mac_address.op('LIKE')('01:80:C2%')
-    ).scalar() or 0
-
-    # Locally Administered (random) - check second hex character
-    random_count = db.query(func.count(MacAddress.id)).filter(
-        MacAddress.is_active == True,
-        func.substr(MacAddress.mac_address, 2, 1).in_(la_chars)
-    ).scalar() or 0
+    # mac_class is computed once when the MAC is stored
+    counts = dict(
+        db.query(MacAddress.mac_class, func.count(MacAddress.id))
+        .filter(MacAddress.is_active == True)
+        .group_by(MacAddress.mac_class)
+        .all()
+    )
 
-    real_count = total - random_count - multicast
+    real_count = counts.get(MAC_CLASS_REAL, 0)
+    random_count = counts.get(MAC_CLASS_RANDOM, 0)
+    multicast = counts.get(MAC_CLASS_MULTICAST, 0)
+    total = real_count + random_count + multicast
 
-    return {
+    return _cache_set("mac-breakdown", {
         "total": total,
         "real": real_count,
         "random": random_count,
         "multicast": multicast,
-    }
+    })
 
 
 @router.get("/top-switches")
@@ -87,26 +186,32 @@ def get_top_switches(
     db: Session = Depends(get_db),
 ):
     """Get top switches by MAC count."""
-    from app.db.models import MacLocation
+    cache_key = ("top-switches", limit)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
 
+    _ensure_switch_summary(db)
+
+    # Counts are pre-aggregated per switch after each discovery
+    mac_count = func.coalesce(SwitchMacSummary.mac_count, 0)
     results = (
         db.query(
             Switch.id,
             Switch.hostname,
-            func.count(MacLocation.id).label("mac_count")
+            mac_count.label("mac_count")
         )
-        .outerjoin(MacLocation, (MacLocation.switch_id == Switch.id) & (MacLocation.is_current == True))
+        .outerjoin(SwitchMacSummary, SwitchMacSummary.switch_id == Switch.id)
         .filter(Switch.is_active == True)
-        .group_by(Switch.id, Switch.hostname)
-        .order_by(func.count(MacLocation.id).desc())
+        .order_by(mac_count.desc())
         .limit(limit)
         .all()
     )
 
-    return [
+    return _cache_set(cache_key, [
         {"id": r.id, "hostname": r.hostname, "mac_count": r.mac_count}
         for r in results
-    ]
+    ])
 
 
 @router.get("/trends")
@@ -115,28 +220,23 @@ def get_mac_trends(
     db: Session = Depends(get_db),
 ):
     """Get MAC count trends over time."""
-    from app.db.models import MacHistory
+    _ensure_history_rollup(db)
 
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=days)
+    start_date = (datetime.utcnow() - timedelta(days=days)).date()
 
-    # Get new MACs per day
+    # New MACs per day, pre-aggregated after each discovery
     results = (
-        db.query(
-            func.date(MacHistory.event_at).label("date"),
-            func.count(MacHistory.id).label("count")
-        )
+        db.query(MacHistoryDaily.day, MacHistoryDaily.event_count)
         .filter(
-            MacHistory.event_at >= start_date,
-            MacHistory.event_type == "new"
+            MacHistoryDaily.event_type == "new",
+            MacHistoryDaily.day >= start_date,
         )
-        .group_by(func.date(MacHistory.event_at))
-        .order_by(func.date(MacHistory.event_at))
+        .order_by(MacHistoryDaily.day)
         .all()
     )
 
     return [
-        {"date": str(r.date), "count": r.count}
+        {"date": str(r.day), "count": r.event_count}
         for r in results
     ]
 
@@ -144,24 +244,36 @@ def get_mac_trends(
 @router.get("/stats-by-site")
 def get_stats_by_site(db: Session = Depends(get_db)):
     """Get statistics grouped by site code (extracted from hostname prefix)."""
-    from app.db.models import MacLocation
+    cached = _cache_get("stats-by-site")
+    if cached is not None:
+        return cached
+
+    _ensure_switch_summary(db)
 
-    # Get switches with their site codes and MAC counts
+    # Get switches and MAC counts per site code; the NULL group holds the
+    # switches without a site code
+    mac_count = func.coalesce(func.sum(SwitchMacSummary.mac_count), 0)
     results = (
         db.query(
             Switch.site_code,
-            func.count(Switch.id.distinct()).label("switch_count"),
-            func.count(MacLocation.id).label("mac_count")
+            func.count(Switch.id).label("switch_count"),
+            mac_count.label("mac_count")
         )
-        .outerjoin(MacLocation, (MacLocation.switch_id == Switch.id) & (MacLocation.is_current == True))
-        .filter(Switch.is_active == True, Switch.site_code.isnot(None))
+        .outerjoin(SwitchMacSummary, SwitchMacSummary.switch_id == Switch.id)
+        .filter(Switch.is_active == True)
         .group_by(Switch.site_code)
         .order_by(Switch.site_code)
         .all()
     )
 
     sites = []
+    switches_without_site = 0
+    macs_without_site = 0
     for r in results:
+        if r.site_code is None:
+            switches_without_site = r.switch_count
+            macs_without_site = r.mac_count
+            continue
         sites.append({
             "site_code": r.site_code,
             "site_name": f"Sede {r.site_code}",
@@ -169,20 +281,9 @@ def get_stats_by_site(db: Session = Depends(get_db)):
             "mac_count": r.mac_count
         })
 
-    # Get totals for switches without site code
-    no_site = (
-        db.query(
-            func.count(Switch.id.distinct()).label("switch_count"),
-            func.count(MacLocation.id).label("mac_count")
-        )
-        .outerjoin(MacLocation, (MacLocation.switch_id == Switch.id) & (MacLocation.is_current == True))
-        .filter(Switch.is_active == True, Switch.site_code.is_(None))
-        .first()
-    )
-
-    return {
+    return _cache_set("stats-by-site", {
         "sites": sites,
         "total_sites": len(sites),
-        "switches_without_site": no_site.switch_count if no_site else 0,
-        "macs_without_site": no_site.mac_count if no_site else 0
-    }
+        "switches_without_site": switches_without_site,
+        "macs_without_site": macs_without_site
+    })
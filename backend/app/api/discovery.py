@@ -1,17 +1,33 @@
 """Discovery API endpoints."""
 import asyncio
+import logging
+import threading
+from dataclasses import asdict, dataclass
 from datetime import datetime
 from typing import Optional, List
 
+import orjson
 from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy import or_, select
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
 from app.db.database import get_db
+from app.api.dashboard import refresh_mac_rollups, schedule_mac_rollups_refresh
+from app.api.graph import clear_sim_cache
+from app.api.mac_path import refresh_switch_paths
 from app.db.models import Switch, DiscoveryLog, MacAddress, MacLocation, MacHistory, Port
 from app.services.discovery import SNMPDiscoveryService, SSHDiscoveryService, MacProcessor
+from app.utils.orjson_response import ORJSONResponse
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Idle interval after which /status/stream sends an SSE comment line
+STATUS_STREAM_KEEPALIVE_SECONDS = 15
 
 
 class DiscoveryStatus(BaseModel):
@@ -58,14 +74,51 @@ class DiscoverySummary(BaseModel):
     switch_results: List[SwitchDiscoveryResult]
 
 
-# In-memory status tracking
-_discovery_status = DiscoveryStatus(
-    status="idle",
-    message="Discovery non avviato"
-)
+@dataclass(slots=True)
+class _DiscoveryState:
+    """Mutable discovery progress, only touched under _discovery_lock."""
+    status: str = "idle"
+    message: str = "Discovery non avviato"
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    switches_processed: int = 0
+    switches_total: int = 0
+    macs_found: int = 0
+    current_switch: Optional[str] = None
+
+
+# In-memory status tracking. The background task mutates _discovery_state
+# under the lock and publishes an immutable dict; readers just grab the
+# current _status_snapshot reference and never see a half-applied update.
+_discovery_state = _DiscoveryState()
+_discovery_lock = threading.Lock()
+_status_snapshot: dict = asdict(_discovery_state)
+
+# /status/stream subscribers as (event loop, asyncio.Event) pairs. Discovery
+# runs in other threads/loops, so they are woken with call_soon_threadsafe.
+_status_subscribers: set = set()
+
+
+def _notify_status_subscribers():
+    for loop, changed in list(_status_subscribers):
+        try:
+            loop.call_soon_threadsafe(changed.set)
+        except RuntimeError:
+            _status_subscribers.discard((loop, changed))  # Loop already closed
+
 
+def _update_status(**changes) -> dict:
+    """Apply changes to the discovery state and publish a new snapshot."""
+    global _status_snapshot
+    with _discovery_lock:
+        for name, value in changes.items():
+            setattr(_discovery_state, name, value)
+        snapshot = _status_snapshot = asdict(_discovery_state)
+    _notify_status_subscribers()
+    return snapshot
 
-def run_discovery_sync(db: Session):
+
+def run_discovery_sync(switch_ids: Optional[List[int]] = None):
     """Synchronous wrapper for async discovery task.
 
     Note: Creates a fresh database session to avoid SQLite locking issues
@@ -75,80 +128,122 @@ def run_discovery_sync(db: Session):
     # Create a fresh session for the background task
     fresh_db = SessionLocal()
     try:
-        asyncio.run(run_discovery_task(fresh_db))
+        asyncio.run(run_discovery_task(fresh_db, switch_ids=switch_ids))
     finally:
         fresh_db.close()
 
 
-async def run_discovery_task(db: Session):
-    """Background task to run SNMP discovery with SSH fallback."""
-    global _discovery_status
+async def run_discovery_task(db: Session, switch_ids: Optional[List[int]] = None):
+    """Background task to run SNMP discovery with SSH fallback.
 
+    Args:
+        switch_ids: Switches selected by the caller; defaults to all active switches
+    """
     try:
-        _discovery_status.status = "running"
-        _discovery_status.message = "Avvio discovery..."
-        _discovery_status.started_at = datetime.utcnow()
-        _discovery_status.switches_processed = 0
-        _discovery_status.macs_found = 0
+        _update_status(
+            status="running",
+            message="Avvio discovery...",
+            started_at=datetime.utcnow(),
+            switches_processed=0,
+            macs_found=0,
+        )
 
-        # Get all active switches
-        switches = db.query(Switch).filter(Switch.is_active == True).all()
-        _discovery_status.switches_total = len(switches)
+        # Get the switches to poll
+        if switch_ids is None:
+            switches = db.query(Switch).filter(Switch.is_active == True).all()
+        else:
+            switches = db.query(Switch).filter(Switch.id.in_(switch_ids)).all()
+        _update_status(switches_total=len(switches))
 
         if not switches:
-            _discovery_status.status = "completed"
-            _discovery_status.message = "Nessuno switch attivo da scansionare"
-            _discovery_status.completed_at = datetime.utcnow()
+            _update_status(
+                status="completed",
+                message="Nessuno switch attivo da scansionare",
+                completed_at=datetime.utcnow(),
+            )
             return
 
-        # Initialize services
-        snmp_service = SNMPDiscoveryService(db)
-        ssh_service = SSHDiscoveryService(db)
+        # Initialize services. Switches are polled concurrently; the lock keeps
+        # each switch's database writes on the shared session one at a time.
+        db_lock = asyncio.Lock()
+        snmp_service = SNMPDiscoveryService(db, db_lock=db_lock)
+        ssh_service = SSHDiscoveryService(db, db_lock=db_lock)
         mac_processor = MacProcessor(db)
+        semaphore = asyncio.Semaphore(max(1, get_settings().discovery_concurrency))
 
         total_macs = 0
+        switches_processed = 0
 
-        for i, switch in enumerate(switches):
-            _discovery_status.current_switch = switch.hostname
-            _discovery_status.message = f"Scanning {switch.hostname} ({i+1}/{len(switches)})..."
+        async def discover_one(i: int, switch: Switch):
+            nonlocal total_macs, switches_processed
 
-            # Run SNMP discovery first (unless SSH fallback is explicitly enabled)
-            result = await snmp_service.discover_switch(switch)
+            async with semaphore:
+                _update_status(
+                    current_switch=switch.hostname,
+                    message=f"Scanning {switch.hostname} ({i+1}/{len(switches)})...",
+                )
 
-            # If SNMP failed and SSH fallback is enabled, try SSH
-            if result["status"] != "success" and switch.use_ssh_fallback:
-                _discovery_status.message = f"SNMP fallito per {switch.hostname}, provo SSH..."
-                result = await ssh_service.discover_switch(switch)
+                # Run SNMP discovery first (unless SSH fallback is explicitly enabled)
+                result = await snmp_service.discover_switch(switch)
+
+                # If SNMP failed and SSH fallback is enabled, try SSH
+                if result["status"] != "success" and switch.use_ssh_fallback:
+                    _update_status(message=f"SNMP fallito per {switch.hostname}, provo SSH...")
+                    result = await ssh_service.discover_switch(switch)
 
             if result["status"] == "success":
                 total_macs += result["mac_count"]
-                _discovery_status.switches_processed += 1
+                switches_processed += 1
+
+            _update_status(switches_processed=switches_processed, macs_found=total_macs)
+
+        outcomes = await asyncio.gather(
+            *(discover_one(i, switch) for i, switch in enumerate(switches)),
+            return_exceptions=True,
+        )
 
-            _discovery_status.macs_found = total_macs
+        # One switch failing must not abort the others, but it is still reported
+        switches_failed = 0
+        for switch, outcome in zip(switches, outcomes):
+            if isinstance(outcome, BaseException):
+                switches_failed += 1
+                logger.error(f"Discovery failed for {switch.hostname}: {outcome!r}")
 
         # Enrich MACs with vendor info
-        _discovery_status.message = "Aggiornamento informazioni vendor..."
+        _update_status(message="Aggiornamento informazioni vendor...")
         mac_processor.update_all_vendor_info()
 
+        # Refresh pre-aggregated per-switch MAC counts and daily trends for the dashboard
+        refresh_mac_rollups(db)
+        refresh_switch_paths(db)
+
         # Finalize
-        _discovery_status.status = "completed"
-        _discovery_status.completed_at = datetime.utcnow()
-        _discovery_status.current_switch = None
-        _discovery_status.message = f"Discovery completato: {_discovery_status.switches_processed}/{len(switches)} switch, {total_macs} MAC trovati"
+        message = f"Discovery completato: {switches_processed}/{len(switches)} switch, {total_macs} MAC trovati"
+        if switches_failed:
+            message += f", {switches_failed} switch in errore"
+        _update_status(
+            status="completed",
+            completed_at=datetime.utcnow(),
+            current_switch=None,
+            message=message,
+        )
 
         # Auto-rebuild network graph after discovery completes
         try:
             from app.services.network_graph import get_network_graph
             graph = get_network_graph()
             graph_result = graph.build(db)
-            _discovery_status.message += f" | Grafo: {graph_result['node_count']} nodi, {graph_result['edge_count']} archi"
+            message += f" | Grafo: {graph_result['node_count']} nodi, {graph_result['edge_count']} archi"
         except Exception as graph_error:
-            _discovery_status.message += f" | Grafo non aggiornato: {str(graph_error)}"
+            message += f" | Grafo non aggiornato: {str(graph_error)}"
+        _update_status(message=message)
 
     except Exception as e:
-        _discovery_status.status = "error"
-        _discovery_status.message = f"Errore: {str(e)}"
-        _discovery_status.current_switch = None
+        _update_status(
+            status="error",
+            message=f"Errore: {str(e)}",
+            current_switch=None,
+        )
 
 
 @router.post("/start", response_model=DiscoveryStartResponse)
@@ -157,16 +252,17 @@ def start_discovery(
     db: Session = Depends(get_db)
 ):
     """Start manual discovery process."""
-    global _discovery_status
+    global _discovery_state, _status_snapshot
 
-    if _discovery_status.status == "running":
+    if _status_snapshot["status"] == "running":
         return DiscoveryStartResponse(
             message="Discovery gia' in esecuzione",
             status="running"
         )
 
-    # Check if there are switches to discover
-    switch_count = db.query(Switch).filter(Switch.is_active == True).count()
+    # Select the switches to discover once; the task polls exactly these
+    switch_ids = [row.id for row in db.query(Switch.id).filter(Switch.is_active == True)]
+    switch_count = len(switch_ids)
     if switch_count == 0:
         return DiscoveryStartResponse(
             message="Nessuno switch configurato. Aggiungi almeno uno switch prima di avviare il discovery.",
@@ -174,14 +270,20 @@ def start_discovery(
         )
 
     # Reset status
-    _discovery_status = DiscoveryStatus(
-        status="running",
-        message="Avvio discovery...",
-        started_at=datetime.utcnow()
-    )
+    with _discovery_lock:
+        _discovery_state = _DiscoveryState(
+            status="running",
+            message="Avvio discovery...",
+            started_at=datetime.utcnow()
+        )
+        _status_snapshot = asdict(_discovery_state)
+    _notify_status_subscribers()
 
-    # Run discovery in background
-    background_tasks.add_task(run_discovery_sync, db)
+    # Run discovery on the discovery scheduler's worker pool; fall back to a
+    # request background task if the scheduler isn't running
+    from app.services.discovery.discovery_scheduler import get_discovery_scheduler
+    if not get_discovery_scheduler().enqueue_now(switch_ids=switch_ids):
+        background_tasks.add_task(run_discovery_sync, switch_ids)
 
     return DiscoveryStartResponse(
         message=f"Discovery avviato per {switch_count} switch",
@@ -192,7 +294,43 @@ def start_discovery(
 @router.get("/status", response_model=DiscoveryStatus)
 def get_discovery_status():
     """Get current discovery status."""
-    return _discovery_status
+    # The snapshot is already a plain dict; returned as a Response so FastAPI
+    # skips response_model validation on this polled endpoint
+    return ORJSONResponse(_status_snapshot)
+
+
+@router.get("/status/stream")
+async def stream_discovery_status():
+    """Stream discovery status as Server-Sent Events.
+
+    Sends the current status on connect and again whenever it changes,
+    so clients don't need to poll /status.
+    """
+    changed = asyncio.Event()
+    subscriber = (asyncio.get_running_loop(), changed)
+    _status_subscribers.add(subscriber)
+
+    async def events():
+        try:
+            last_sent = None
+            while True:
+                snapshot = _status_snapshot
+                if snapshot is not last_sent:
+                    last_sent = snapshot
+                    yield b"data: " + orjson.dumps(snapshot) + b"\n\n"
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=STATUS_STREAM_KEEPALIVE_SECONDS)
+                    changed.clear()
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+        finally:
+            _status_subscribers.discard(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/logs", response_model=List[DiscoveryLogResponse])
@@ -201,29 +339,25 @@ def get_discovery_logs(
     db: Session = Depends(get_db)
 ):
     """Get recent discovery logs."""
-    logs = db.query(DiscoveryLog).order_by(
-        DiscoveryLog.started_at.desc()
-    ).limit(limit).all()
-
-    result = []
-    for log in logs:
-        switch_hostname = None
-        if log.switch:
-            switch_hostname = log.switch.hostname
-
-        result.append(DiscoveryLogResponse(
-            id=log.id,
-            switch_hostname=switch_hostname,
-            discovery_type=log.discovery_type,
-            status=log.status,
-            mac_count=log.mac_count,
-            error_message=log.error_message,
-            started_at=log.started_at,
-            completed_at=log.completed_at,
-            duration_ms=log.duration_ms,
-        ))
+    # Plain rows (no ORM identity map / instrumentation), hostname via join
+    stmt = (
+        select(
+            DiscoveryLog.id,
+            Switch.hostname.label("switch_hostname"),
+            DiscoveryLog.discovery_type,
+            DiscoveryLog.status,
+            DiscoveryLog.mac_count,
+            DiscoveryLog.error_message,
+            DiscoveryLog.started_at,
+            DiscoveryLog.completed_at,
+            DiscoveryLog.duration_ms,
+        )
+        .outerjoin(Switch, Switch.id == DiscoveryLog.switch_id)
+        .order_by(DiscoveryLog.started_at.desc())
+        .limit(limit)
+    )
 
-    return result
+    return ORJSONResponse([dict(row) for row in db.execute(stmt).mappings()])
 
 
 @router.post("/switch/{switch_id}", response_model=SwitchDiscoveryResult)
@@ -250,13 +384,16 @@ async def discover_single_switch(
             ssh_service = SSHDiscoveryService(db)
             result = await ssh_service.discover_switch(switch)
 
-    # Auto-rebuild network graph after single switch discovery
-    try:
-        from app.services.network_graph import get_network_graph
-        graph = get_network_graph()
-        graph.build(db)
-    except Exception:
-        pass  # Non-critical, grafo si ricostruirà al prossimo full discovery
+    if result["status"] == "success":
+        # Path simulations go stale now; the rollups are refreshed debounced,
+        # off the request path like the graph rebuild below
+        clear_sim_cache()
+        schedule_mac_rollups_refresh()
+
+    # Auto-rebuild network graph after single switch discovery (debounced,
+    # off the request path)
+    from app.services.network_graph import get_network_graph
+    get_network_graph().schedule_rebuild()
 
     return SwitchDiscoveryResult(
         switch_id=result["switch_id"],
@@ -365,26 +502,36 @@ def simulate_mac_move(
     """
     from app.services.alerts.alert_service import AlertService
 
-    # Get the MAC address
-    mac = db.query(MacAddress).filter(MacAddress.id == mac_id).first()
-    if not mac:
+    # Get the MAC address with its current location, old switch and old port
+    row = (
+        db.query(MacAddress, MacLocation, Switch, Port)
+        .outerjoin(
+            MacLocation,
+            (MacLocation.mac_id == MacAddress.id) & (MacLocation.is_current == True)
+        )
+        .outerjoin(Switch, Switch.id == MacLocation.switch_id)
+        .outerjoin(Port, Port.id == MacLocation.port_id)
+        .filter(MacAddress.id == mac_id)
+        .first()
+    )
+    if not row:
         raise HTTPException(status_code=404, detail="MAC non trovato")
-
-    # Get the new switch and port
-    new_switch = db.query(Switch).filter(Switch.id == new_switch_id).first()
-    if not new_switch:
+    mac, current_location, old_switch, old_port = row
+
+    # Get the new switch and port in one query
+    new_row = (
+        db.query(Switch, Port)
+        .outerjoin(Port, Port.id == new_port_id)
+        .filter(Switch.id == new_switch_id)
+        .first()
+    )
+    if not new_row:
         raise HTTPException(status_code=404, detail="Nuovo switch non trovato")
+    new_switch, new_port = new_row
 
-    new_port = db.query(Port).filter(Port.id == new_port_id).first()
     if not new_port:
         raise HTTPException(status_code=404, detail="Nuova porta non trovata")
 
-    # Get current location
-    current_location = db.query(MacLocation).filter(
-        MacLocation.mac_id == mac_id,
-        MacLocation.is_current == True
-    ).first()
-
     if not current_location:
         raise HTTPException(status_code=404, detail="Location corrente non trovata per questo MAC")
 
@@ -395,10 +542,6 @@ def simulate_mac_move(
             "moved": False
         }
 
-    # Get old switch and port for alert
-    old_switch = db.query(Switch).filter(Switch.id == current_location.switch_id).first()
-    old_port = db.query(Port).filter(Port.id == current_location.port_id).first()
-
     # Create history entry for the move
     history_entry = MacHistory(
         mac_id=mac.id,
@@ -410,7 +553,6 @@ def simulate_mac_move(
         previous_switch_id=current_location.switch_id,
         previous_port_id=current_location.port_id,
     )
-    db.add(history_entry)
 
     # Generate the movement alert
     alert_service = AlertService(db)
@@ -438,9 +580,10 @@ def simulate_mac_move(
         seen_at=datetime.utcnow(),
         is_current=True,
     )
-    db.add(new_location)
+    db.add_all([history_entry, new_location])
 
     db.commit()
+    refresh_mac_rollups(db)
 
     return {
         "message": f"MAC {mac.mac_address} spostato da {old_switch.hostname}:{old_port.port_name} a {new_switch.hostname}:{new_port.port_name}",
@@ -560,6 +703,8 @@ async def seed_discovery(
     # Process switches level by level (BFS)
     while to_process and current_depth < request.max_depth:
         next_level = []
+        # Neighbors first seen at this level, resolved against the DB in one batch
+        pending = []
 
         for switch in to_process:
             try:
@@ -576,48 +721,11 @@ async def seed_discovery(
                         "added": False
                     }
 
-                    # Try to identify the neighbor
-                    neighbor_switch = None
                     neighbor_ip = neighbor.remote_mgmt_address
 
                     if neighbor_ip and neighbor_ip not in discovered_ips:
                         discovered_ips.add(neighbor_ip)
-
-                        # Check if switch already exists by IP
-                        neighbor_switch = db.query(Switch).filter(
-                            Switch.ip_address == neighbor_ip
-                        ).first()
-
-                        if not neighbor_switch and neighbor.remote_system_name:
-                            # Check by hostname
-                            neighbor_switch = db.query(Switch).filter(
-                                Switch.hostname == neighbor.remote_system_name
-                            ).first()
-
-                        if neighbor_switch:
-                            result.switches_already_exist += 1
-                            neighbor_info["added"] = False
-                            neighbor_info["exists"] = True
-                            next_level.append(neighbor_switch)
-                        else:
-                            # Create new switch from discovered neighbor
-                            new_hostname = neighbor.remote_system_name or f"DISCOVERED-{neighbor_ip.replace('.', '-')}"
-
-                            new_switch = Switch(
-                                hostname=new_hostname,
-                                ip_address=neighbor_ip,
-                                device_type=request.device_type,
-                                snmp_community=request.snmp_community,
-                                group_id=request.group_id,
-                                is_active=True
-                            )
-                            db.add(new_switch)
-                            db.flush()
-
-                            result.switches_added += 1
-                            neighbor_info["added"] = True
-                            neighbor_info["new_switch_id"] = new_switch.id
-                            next_level.append(new_switch)
+                        pending.append((neighbor, neighbor_info))
 
                     result.discovered_switches.append(neighbor_info)
 
@@ -625,18 +733,67 @@ async def seed_discovery(
                 error_msg = f"Errore durante discovery di {switch.hostname}: {str(e)}"
                 result.errors.append(error_msg)
 
+        if pending:
+            # Check which neighbors already exist, by IP or hostname, in one query
+            level_ips = [neighbor.remote_mgmt_address for neighbor, _ in pending]
+            level_names = [
+                neighbor.remote_system_name for neighbor, _ in pending
+                if neighbor.remote_system_name
+            ]
+            existing = db.query(Switch).filter(
+                or_(Switch.ip_address.in_(level_ips), Switch.hostname.in_(level_names))
+            ).all()
+            by_ip = {s.ip_address: s for s in existing}
+            by_hostname = {s.hostname: s for s in existing}
+
+            new_switches = []
+            for neighbor, neighbor_info in pending:
+                neighbor_ip = neighbor.remote_mgmt_address
+
+                neighbor_switch = by_ip.get(neighbor_ip)
+                if not neighbor_switch and neighbor.remote_system_name:
+                    neighbor_switch = by_hostname.get(neighbor.remote_system_name)
+
+                if neighbor_switch:
+                    result.switches_already_exist += 1
+                    neighbor_info["added"] = False
+                    neighbor_info["exists"] = True
+                    next_level.append(neighbor_switch)
+                else:
+                    # Create new switch from discovered neighbor
+                    new_hostname = neighbor.remote_system_name or f"DISCOVERED-{neighbor_ip.replace('.', '-')}"
+
+                    new_switch = Switch(
+                        hostname=new_hostname,
+                        ip_address=neighbor_ip,
+                        device_type=request.device_type,
+                        snmp_community=request.snmp_community,
+                        group_id=request.group_id,
+                        is_active=True
+                    )
+                    if neighbor.remote_system_name:
+                        by_hostname[new_hostname] = new_switch
+                    new_switches.append((new_switch, neighbor_info))
+
+                    result.switches_added += 1
+                    neighbor_info["added"] = True
+                    next_level.append(new_switch)
+
+            if new_switches:
+                # One flush for the whole level; the INSERTs are batched
+                db.add_all([new_switch for new_switch, _ in new_switches])
+                db.flush()
+                for new_switch, neighbor_info in new_switches:
+                    neighbor_info["new_switch_id"] = new_switch.id
+
         to_process = next_level
         current_depth += 1
 
     db.commit()
 
-    # Auto-rebuild network graph after seed discovery
-    try:
-        from app.services.network_graph import get_network_graph
-        graph = get_network_graph()
-        graph.build(db)
-    except Exception:
-        pass  # Non-critical
+    # Auto-rebuild network graph after seed discovery (debounced, off the request path)
+    from app.services.network_graph import get_network_graph
+    get_network_graph().schedule_rebuild()
 
     if result.switches_added > 0:
         result.message = f"Seed discovery completato: {result.switches_added} nuovi switch aggiunti, {result.switches_already_exist} gia' presenti"
@@ -2,16 +2,43 @@
 
 Provides pre-calculated graph operations without SSH.
 """
-from typing import List, Optional
+import ipaddress
+import re
+import threading
+from typing import List, Optional, Tuple
 
+from cachetools import LRUCache
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
-from app.services.network_graph import get_network_graph
+from app.services.network_graph import NetworkGraph, get_network_graph
+from app.utils.orjson_response import ORJSONResponse
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+
+# Seconds a client should wait before retrying while the graph is rebuilt
+GRAPH_REBUILD_RETRY_AFTER = 2
+
+
+def _valid_graph() -> NetworkGraph:
+    """
+    Return the live network graph.
+
+    An invalidated graph is rebuilt in the background rather than on the
+    request path: the caller gets 503 with Retry-After until it is ready.
+    """
+    graph = get_network_graph()
+    if not graph.is_valid:
+        graph.request_rebuild()
+        raise HTTPException(
+            status_code=503,
+            detail="Grafo di rete in ricostruzione, riprovare tra qualche secondo",
+            headers={"Retry-After": str(GRAPH_REBUILD_RETRY_AFTER)},
+        )
+    return graph
 
 
 class GraphStatsResponse(BaseModel):
@@ -99,42 +126,26 @@ def lookup_mac_path_offline(mac_address: str, db: Session = Depends(get_db)):
     This is the main offline lookup - no SSH required.
     Returns path from core to endpoint switch.
     """
-    graph = get_network_graph()
-
-    # Auto-build if not valid
-    if not graph.is_valid:
-        graph.build(db)
+    graph = _valid_graph()
 
     result = graph.find_mac_path(mac_address, db)
 
     if not result:
         raise HTTPException(status_code=404, detail="MAC address non trovato o senza posizione corrente")
 
-    return MacPathOfflineResponse(
-        mac_address=result["mac_address"],
-        ip_address=result.get("ip_address"),
-        vendor_name=result.get("vendor_name"),
-        endpoint_switch_id=result["endpoint_switch_id"],
-        endpoint_switch_hostname=result["endpoint_switch_hostname"],
-        endpoint_port=result["endpoint_port"],
-        path=[PathNode(**n) for n in result["path"]],
-        path_node_ids=result["path_node_ids"],
-        path_edge_keys=result["path_edge_keys"],
-        lookup_type=result.get("lookup_type", "offline_graph"),
-    )
+    # find_mac_path already returns the MacPathOfflineResponse shape; returned
+    # as a Response so FastAPI skips per-node response_model validation
+    return ORJSONResponse(result)
 
 
 @router.get("/path/{from_switch_id}/{to_switch_id}", response_model=SwitchPathResponse)
-def get_switch_path(from_switch_id: int, to_switch_id: int, db: Session = Depends(get_db)):
+def get_switch_path(from_switch_id: int, to_switch_id: int):
     """
     Find shortest path between two switches.
 
     Uses BFS on pre-calculated graph.
     """
-    graph = get_network_graph()
-
-    if not graph.is_valid:
-        graph.build(db)
+    graph = _valid_graph()
 
     path = graph.find_path(from_switch_id, to_switch_id)
 
@@ -153,46 +164,27 @@ def get_switch_path(from_switch_id: int, to_switch_id: int, db: Session = Depend
 
 
 @router.get("/neighbors/{switch_id}", response_model=SwitchNeighborsResponse)
-def get_switch_neighbors(switch_id: int, db: Session = Depends(get_db)):
+def get_switch_neighbors(switch_id: int):
     """Get all neighbors of a switch from the cached graph."""
-    graph = get_network_graph()
-
-    if not graph.is_valid:
-        graph.build(db)
+    graph = _valid_graph()
 
     neighbors = graph.get_switch_neighbors(switch_id)
 
-    return SwitchNeighborsResponse(
-        switch_id=switch_id,
-        neighbors=[NeighborInfo(**n) for n in neighbors],
-        neighbor_count=len(neighbors),
-    )
+    return ORJSONResponse({
+        "switch_id": switch_id,
+        "neighbors": neighbors,
+        "neighbor_count": len(neighbors),
+    })
 
 
 @router.get("/core-switches")
-def get_core_switches(db: Session = Depends(get_db)):
+def get_core_switches():
     """Get identified core switches (highest connectivity)."""
-    graph = get_network_graph()
-
-    if not graph.is_valid:
-        graph.build(db)
-
-    core_ids = graph.core_switch_ids
-    core_info = []
-
-    for sw_id in core_ids:
-        sw_info = graph.switches.get(sw_id, {})
-        neighbor_count = len(graph.adjacency.get(sw_id, {}))
-        core_info.append({
-            "switch_id": sw_id,
-            "hostname": sw_info.get("hostname", "Unknown"),
-            "ip_address": sw_info.get("ip_address", ""),
-            "neighbor_count": neighbor_count,
-        })
+    graph = _valid_graph()
 
     return {
-        "core_switches": core_info,
-        "count": len(core_info),
+        "core_switches": graph.core_switch_info,
+        "count": len(graph.core_switch_info),
     }
 
 
@@ -234,6 +226,40 @@ class PathSimulationResponse(BaseModel):
     notes: List[str]
 
 
+# Single-pass MAC normalization (separators to ':', hex digits upper-cased)
+_MAC_NORMALIZE = str.maketrans("-.abcdef", "::ABCDEF")
+_MAC_RE = re.compile(r"^[0-9A-F]{2}(:[0-9A-F]{2}){5}$")
+
+# Simulation results keyed by (graph generation, normalized source,
+# normalized destination). Every graph build or invalidation bumps the
+# generation, retiring older entries; MAC location writes clear the cache
+# (see clear_sim_cache). Only results with both endpoints found are kept.
+_sim_cache: LRUCache = LRUCache(maxsize=1024)
+_sim_cache_lock = threading.Lock()
+_SIM_NOT_FOUND_STATUSES = ("source_not_found", "destination_not_found")
+
+
+def clear_sim_cache():
+    """Drop cached simulations, which depend on where MACs currently sit."""
+    with _sim_cache_lock:
+        _sim_cache.clear()
+
+
+def _normalize_endpoint(identifier: str) -> Optional[Tuple[str, str]]:
+    """
+    ("ip", canonical address) or ("mac", AA:BB:... form) for an endpoint
+    identifier; None if it is neither. Canonical IPs make IPv6 spellings match.
+    """
+    identifier = identifier.strip()
+    try:
+        return "ip", str(ipaddress.ip_address(identifier))
+    except ValueError:
+        mac_normalized = identifier.translate(_MAC_NORMALIZE)
+        if not _MAC_RE.match(mac_normalized):
+            return None
+        return "mac", mac_normalized
+
+
 @router.post("/simulate-path", response_model=PathSimulationResponse)
 def simulate_path(request: PathSimulationRequest, db: Session = Depends(get_db)):
     """
@@ -242,61 +268,81 @@ def simulate_path(request: PathSimulationRequest, db: Session = Depends(get_db))
     This is a simplified simulation without ACL/firewall checks.
     Returns the L2 path through the network.
     """
-    from app.db.models import MacAddress, MacLocation, Switch, Port
+    graph = _valid_graph()
+
+    key = (
+        graph.generation,
+        _normalize_endpoint(request.source) or request.source,
+        _normalize_endpoint(request.destination) or request.destination,
+    )
+    with _sim_cache_lock:
+        cached = _sim_cache.get(key)
+    if cached is not None:
+        # Echo the caller's spelling of the endpoints
+        return cached.model_copy(
+            update={"source": request.source, "destination": request.destination}
+        )
+
+    result = _simulate_path(request, db, graph)
+    if result.status not in _SIM_NOT_FOUND_STATUSES:
+        with _sim_cache_lock:
+            _sim_cache[key] = result
+    return result
 
-    graph = get_network_graph()
-    if not graph.is_valid:
-        graph.build(db)
+
+def _simulate_path(request: PathSimulationRequest, db: Session, graph) -> PathSimulationResponse:
+    # Models are built with model_construct: every value already comes typed
+    # from the database or the graph, so per-hop validation is skipped
+    from app.db.models import MacAddress, MacLocation, Switch, Port
 
     notes = []
 
-    # Helper to find endpoint by MAC or IP
+    # Helper to find endpoint by MAC or IP (one joined query)
     def find_endpoint(identifier: str):
-        # Normalize MAC
-        mac_normalized = identifier.upper().replace("-", ":").replace(".", ":")
-
-        # Try MAC first
-        loc = db.query(MacLocation).join(MacAddress).filter(
-            MacAddress.mac_address == mac_normalized,
-            MacLocation.is_current == True
-        ).first()
-
-        if loc:
-            mac = db.query(MacAddress).filter(MacAddress.id == loc.mac_id).first()
-            sw = db.query(Switch).filter(Switch.id == loc.switch_id).first()
-            pt = db.query(Port).filter(Port.id == loc.port_id).first()
-            return {
-                "mac": mac.mac_address if mac else None,
-                "switch_id": sw.id if sw else None,
-                "switch": sw.hostname if sw else None,
-                "port": pt.port_name if pt else None,
-            }
-
-        # Try IP
-        loc = db.query(MacLocation).filter(
-            MacLocation.ip_address == identifier,
-            MacLocation.is_current == True
-        ).first()
-
-        if loc:
-            mac = db.query(MacAddress).filter(MacAddress.id == loc.mac_id).first()
-            sw = db.query(Switch).filter(Switch.id == loc.switch_id).first()
-            pt = db.query(Port).filter(Port.id == loc.port_id).first()
-            return {
-                "mac": mac.mac_address if mac else None,
-                "switch_id": sw.id if sw else None,
-                "switch": sw.hostname if sw else None,
-                "port": pt.port_name if pt else None,
-            }
-
-        return None
+        # Normalize once and dispatch: an IP or a MAC; anything else cannot
+        # be resolved
+        endpoint = _normalize_endpoint(identifier)
+        if endpoint is None:
+            return None
+        kind, value = endpoint
+        if kind == "ip":
+            endpoint_filter = MacLocation.ip_address == value
+        else:
+            endpoint_filter = MacAddress.mac_address == value
+
+        row = (
+            db.query(MacLocation)
+            .join(MacAddress, MacAddress.id == MacLocation.mac_id)
+            .join(Switch, Switch.id == MacLocation.switch_id)
+            .outerjoin(Port, Port.id == MacLocation.port_id)
+            .filter(endpoint_filter, MacLocation.is_current == True)
+            .with_entities(
+                MacAddress.mac_address,
+                Switch.id,
+                Switch.hostname,
+                Switch.ip_address,
+                Port.port_name,
+            )
+            .first()
+        )
+
+        if not row:
+            return None
+
+        return {
+            "mac": row[0],
+            "switch_id": row[1],
+            "switch": row[2],
+            "switch_ip": row[3],
+            "port": row[4],
+        }
 
     # Find source and destination
     source_info = find_endpoint(request.source)
     dest_info = find_endpoint(request.destination)
 
     if not source_info:
-        return PathSimulationResponse(
+        return PathSimulationResponse.model_construct(
             source=request.source,
             destination=request.destination,
             path_found=False,
@@ -308,7 +354,7 @@ def simulate_path(request: PathSimulationRequest, db: Session = Depends(get_db))
         )
 
     if not dest_info:
-        return PathSimulationResponse(
+        return PathSimulationResponse.model_construct(
             source=request.source,
             source_mac=source_info["mac"],
             source_switch_id=source_info["switch_id"],
@@ -325,9 +371,8 @@ def simulate_path(request: PathSimulationRequest, db: Session = Depends(get_db))
 
     # Same switch?
     if source_info["switch_id"] == dest_info["switch_id"]:
-        sw = db.query(Switch).filter(Switch.id == source_info["switch_id"]).first()
         notes.append("Source and destination on same switch - direct L2 forwarding")
-        return PathSimulationResponse(
+        return PathSimulationResponse.model_construct(
             source=request.source,
             source_mac=source_info["mac"],
             source_switch_id=source_info["switch_id"],
@@ -339,11 +384,11 @@ def simulate_path(request: PathSimulationRequest, db: Session = Depends(get_db))
             destination_switch=dest_info["switch"],
             destination_port=dest_info["port"],
             path_found=True,
-            hops=[PathSimulationHop(
+            hops=[PathSimulationHop.model_construct(
                 hop_number=1,
-                switch_id=sw.id,
-                switch_hostname=sw.hostname,
-                switch_ip=sw.ip_address,
+                switch_id=source_info["switch_id"],
+                switch_hostname=source_info["switch"],
+                switch_ip=source_info["switch_ip"],
                 ingress_port=source_info["port"],
                 egress_port=dest_info["port"],
                 latency_estimate_ms=0.05
@@ -359,7 +404,7 @@ def simulate_path(request: PathSimulationRequest, db: Session = Depends(get_db))
 
     if not path:
         notes.append("No L2 path exists between source and destination switches")
-        return PathSimulationResponse(
+        return PathSimulationResponse.model_construct(
             source=request.source,
             source_mac=source_info["mac"],
             source_switch_id=source_info["switch_id"],
@@ -378,14 +423,19 @@ def simulate_path(request: PathSimulationRequest, db: Session = Depends(get_db))
             notes=notes
         )
 
-    # Build hop list
+    # Build hop list (all hop switches fetched in one query)
+    sw_rows = db.query(Switch.id, Switch.hostname, Switch.ip_address).filter(
+        Switch.id.in_(path)
+    ).all()
+    sw_map = {r.id: r for r in sw_rows}
+
     hops = []
     for i, sw_id in enumerate(path):
-        sw = db.query(Switch).filter(Switch.id == sw_id).first()
+        sw = sw_map.get(sw_id)
         if sw:
             ingress = source_info["port"] if i == 0 else None
             egress = dest_info["port"] if i == len(path) - 1 else None
-            hops.append(PathSimulationHop(
+            hops.append(PathSimulationHop.model_construct(
                 hop_number=i + 1,
                 switch_id=sw.id,
                 switch_hostname=sw.hostname,
@@ -397,7 +447,7 @@ def simulate_path(request: PathSimulationRequest, db: Session = Depends(get_db))
 
     notes.append(f"L2 path found with {len(path)} hops")
 
-    return PathSimulationResponse(
+    return PathSimulationResponse.model_construct(
         source=request.source,
         source_mac=source_info["mac"],
         source_switch_id=source_info["switch_id"],
@@ -420,6 +470,5 @@ def simulate_path(request: PathSimulationRequest, db: Session = Depends(get_db))
 @router.post("/invalidate")
 def invalidate_graph():
     """Invalidate the cached graph (forces rebuild on next lookup)."""
-    from app.services.network_graph import NetworkGraph
     NetworkGraph.invalidate()
     return {"status": "ok", "message": "Graph cache invalidated"}
@@ -22,6 +22,11 @@ def get_group_with_count(db: Session, group: SwitchGroup) -> dict:
         Switch.group_id == group.id
     ).scalar() or 0
 
+    return _group_to_dict(group, switch_count)
+
+
+def _group_to_dict(group: SwitchGroup, switch_count: int) -> dict:
+    """Build the SwitchGroupResponse payload for a group row."""
     return {
         "id": group.id,
         "name": group.name,
@@ -51,10 +56,28 @@ def list_groups(
             (SwitchGroup.description.ilike(search_term))
         )
 
-    total = query.count()
-    groups = query.order_by(SwitchGroup.name).offset(skip).limit(limit).all()
+    # Page, per-group switch counts and filtered total in one round-trip:
+    # COUNT() OVER () is evaluated after GROUP BY but before LIMIT/OFFSET
+    rows = (
+        query.outerjoin(Switch, Switch.group_id == SwitchGroup.id)
+        .add_columns(
+            func.count(Switch.id).label("switch_count"),
+            func.count().over().label("total"),
+        )
+        .group_by(SwitchGroup.id)
+        .order_by(SwitchGroup.name)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+    if rows:
+        total = rows[0].total
+    else:
+        # Page past the end: no row to carry the window value
+        total = query.with_entities(func.count(SwitchGroup.id)).scalar()
 
-    items = [get_group_with_count(db, g) for g in groups]
+    items = [_group_to_dict(row[0], row.switch_count) for row in rows]
 
     return SwitchGroupListResponse(items=items, total=total)
 
@@ -62,8 +85,10 @@ def list_groups(
 @router.post("", response_model=SwitchGroupResponse, status_code=201)
 def create_group(group_data: SwitchGroupCreate, db: Session = Depends(get_db)):
     """Create a new switch group."""
-    # Check for duplicate name
-    existing = db.query(SwitchGroup).filter(SwitchGroup.name == group_data.name).first()
+    # Check for duplicate name (SELECT EXISTS, no row materialized)
+    existing = db.query(
+        db.query(SwitchGroup.id).filter(SwitchGroup.name == group_data.name).exists()
+    ).scalar()
     if existing:
         raise HTTPException(status_code=400, detail="Gruppo con questo nome esiste gia'")
 
@@ -103,10 +128,12 @@ def update_group(group_id: int, group_data: SwitchGroupUpdate, db: Session = Dep
 
     # Check for duplicate name if updating
     if "name" in update_data and update_data["name"] != group.name:
-        existing = db.query(SwitchGroup).filter(
-            SwitchGroup.name == update_data["name"],
-            SwitchGroup.id != group_id
-        ).first()
+        existing = db.query(
+            db.query(SwitchGroup.id).filter(
+                SwitchGroup.name == update_data["name"],
+                SwitchGroup.id != group_id
+            ).exists()
+        ).scalar()
         if existing:
             raise HTTPException(status_code=400, detail="Gruppo con questo nome esiste gia'")
 
@@ -133,12 +160,15 @@ def delete_group(group_id: int, db: Session = Depends(get_db)):
     if not group:
         raise HTTPException(status_code=404, detail="Gruppo non trovato")
 
-    # Check if any switches are using this group
-    switch_count = db.query(func.count(Switch.id)).filter(
-        Switch.group_id == group_id
+    # Check if any switches are using this group; only count them for the error
+    in_use = db.query(
+        db.query(Switch.id).filter(Switch.group_id == group_id).exists()
     ).scalar()
 
-    if switch_count > 0:
+    if in_use:
+        switch_count = db.query(func.count(Switch.id)).filter(
+            Switch.group_id == group_id
+        ).scalar()
         raise HTTPException(
             status_code=400,
             detail=f"Impossibile eliminare: {switch_count} switch usano questo gruppo"
@@ -1,16 +1,143 @@
 """API endpoints for Host management (IP Fabric-like host table)."""
+import re
+import threading
+from collections import Counter
 from datetime import datetime
 from typing import Optional
 
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from sqlalchemy import func, or_
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, or_
+from sqlalchemy.orm import Session, joinedload
 
 from app.db.database import get_db
-from app.db.models import Host, MacAddress, MacLocation, Switch, Port
+from app.db.models import Host, HostStatsRollup, MacAddress, MacLocation, Switch, Port
+from app.services.discovery.snmp_discovery import SNMPDiscoveryService
+from app.utils.orjson_response import ORJSONResponse
+
+router = APIRouter(prefix="/hosts", tags=["hosts"], default_response_class=ORJSONResponse)
+
+# Vendor name tokens used to classify hosts discovered from the MAC table
+_VIRTUAL_VENDOR_TOKENS = ("vmware", "virtual", "hyperv", "kvm", "xen")
+_INFRA_VENDOR_TOKENS = (
+    "cisco", "huawei", "juniper", "arista", "extreme", "hp networking", "dell networking",
+)
+_VIRTUAL_VENDOR_RE = re.compile("|".join(map(re.escape, _VIRTUAL_VENDOR_TOKENS)), re.IGNORECASE)
+_INFRA_VENDOR_RE = re.compile("|".join(map(re.escape, _INFRA_VENDOR_TOKENS)), re.IGNORECASE)
+
+# Short-lived cache for /hosts/stats; every endpoint that writes hosts clears it
+_host_stats_cache: TTLCache = TTLCache(maxsize=1, ttl=30)
+_host_stats_cache_lock = threading.Lock()
+
+# Boolean counters kept in host_stats_rollup, besides "total"
+_HOST_STATS_COUNTERS = (
+    ("active", Host.is_active),
+    ("infrastructure", Host.is_infrastructure),
+    ("virtual", Host.is_virtual),
+    ("critical", Host.is_critical),
+    ("discovery_attempted", Host.discovery_attempted),
+)
+
+# Grouped dimensions kept in host_stats_rollup (NULL is stored as "")
+_HOST_STATS_DIMENSIONS = (
+    ("device_type", Host.device_type),
+    ("vendor", Host.vendor_name),
+    ("site", Host.site_code),
+    ("discovery_result", Host.discovery_result),
+)
+
+
+def clear_host_stats_cache():
+    """Drop the cached host statistics."""
+    with _host_stats_cache_lock:
+        _host_stats_cache.clear()
+
+
+def refresh_host_stats(db: Session):
+    """Recompute the host_stats_rollup table after a bulk write to hosts."""
+    # Scalar counters in one scan via conditional aggregates (COUNT ... FILTER)
+    counters = db.query(
+        func.count(Host.id),
+        *(func.count(Host.id).filter(column == True) for _, column in _HOST_STATS_COUNTERS),
+    ).one()
+    names = ("total",) + tuple(name for name, _ in _HOST_STATS_COUNTERS)
+    rows = [
+        {"dimension": "counter", "value": name, "host_count": count}
+        for name, count in zip(names, counters)
+    ]
+
+    for dimension, column in _HOST_STATS_DIMENSIONS:
+        value = func.coalesce(column, "")
+        rows.extend(
+            {"dimension": dimension, "value": v, "host_count": c}
+            for v, c in db.query(value, func.count(Host.id)).group_by(value)
+        )
+
+    db.execute(delete(HostStatsRollup))
+    db.bulk_insert_mappings(HostStatsRollup, rows)
+    db.commit()
+    clear_host_stats_cache()
+
+
+def _host_stats_keys(host: Host) -> list:
+    """(dimension, value) rollup rows that count this host."""
+    keys = [("counter", "total")]
+    keys.extend(
+        ("counter", name) for name, column in _HOST_STATS_COUNTERS if getattr(host, column.key)
+    )
+    keys.extend(
+        (dimension, getattr(host, column.key) or "")
+        for dimension, column in _HOST_STATS_DIMENSIONS
+    )
+    return keys
+
+
+def _apply_host_stats_delta(db: Session, removed: list, added: list):
+    """
+    Move a single host's counts in host_stats_rollup, in the caller's
+    transaction. removed/added are _host_stats_keys() before and after the
+    write. A rollup not built yet is left to _load_host_stats.
+    """
+    delta = Counter(added)
+    delta.subtract(removed)
+    delta = {key: change for key, change in delta.items() if change}
+    if not delta or db.query(HostStatsRollup.dimension).first() is None:
+        return
+
+    for (dimension, value), change in delta.items():
+        updated = (
+            db.query(HostStatsRollup)
+            .filter(HostStatsRollup.dimension == dimension, HostStatsRollup.value == value)
+            .update(
+                {HostStatsRollup.host_count: HostStatsRollup.host_count + change},
+                synchronize_session=False,
+            )
+        )
+        if not updated and change > 0:
+            db.add(HostStatsRollup(dimension=dimension, value=value, host_count=change))
+
+    # Grouped values no host has any more disappear, as in a full recompute
+    if any(change < 0 for change in delta.values()):
+        db.query(HostStatsRollup).filter(
+            HostStatsRollup.dimension != "counter", HostStatsRollup.host_count <= 0
+        ).delete(synchronize_session=False)
 
-router = APIRouter(prefix="/hosts", tags=["hosts"])
+
+def _load_host_stats(db: Session) -> dict:
+    """Read host_stats_rollup as {dimension: {value: count}}, building it if empty."""
+    rows = db.query(HostStatsRollup).all()
+    if not rows:
+        refresh_host_stats(db)
+        rows = db.query(HostStatsRollup).all()
+
+    stats = {"counter": {}}
+    for dimension, _ in _HOST_STATS_DIMENSIONS:
+        stats[dimension] = {}
+    for row in rows:
+        stats.setdefault(row.dimension, {})[row.value] = row.host_count
+    return stats
 
 
 # Pydantic schemas
@@ -25,10 +152,10 @@ class HostResponse(BaseModel):
     device_model: Optional[str]
     os_type: Optional[str]
     edge_switch_id: Optional[int]
-    edge_switch_hostname: Optional[str]
-    edge_switch_ip: Optional[str]
+    edge_switch_hostname: Optional[str] = None
+    edge_switch_ip: Optional[str] = None
     edge_port_id: Optional[int]
-    edge_port_name: Optional[str]
+    edge_port_name: Optional[str] = None
     vlan_id: Optional[int]
     vrf: Optional[str]
     site_code: Optional[str]
@@ -69,8 +196,36 @@ class HostStats(BaseModel):
     by_site: dict
 
 
+# HostResponse fields that are plain columns of the hosts table
+_HOST_COLUMN_FIELDS = tuple(
+    name for name in HostResponse.model_fields
+    if name not in ("edge_switch_hostname", "edge_switch_ip", "edge_port_name")
+)
+
+
+# Columns of a host list row: plain rows, no ORM identity map / instrumentation
+_HOST_LIST_COLUMNS = (
+    *(getattr(Host, name) for name in _HOST_COLUMN_FIELDS),
+    Switch.hostname.label("edge_switch_hostname"),
+    Switch.ip_address.label("edge_switch_ip"),
+    Port.port_name.label("edge_port_name"),
+)
+
+
+def _host_to_response(host: Host) -> HostResponse:
+    """Build the HostResponse for a host, with edge switch/port eager-loaded."""
+    # Column fields are copied by pydantic straight from the ORM object
+    response = HostResponse.model_validate(host)
+    if host.edge_switch:
+        response.edge_switch_hostname = host.edge_switch.hostname
+        response.edge_switch_ip = host.edge_switch.ip_address
+    if host.edge_port:
+        response.edge_port_name = host.edge_port.port_name
+    return response
+
+
 @router.get("", response_model=HostListResponse)
-async def list_hosts(
+def list_hosts(
     search: Optional[str] = Query(None, description="Search by MAC, IP, hostname"),
     device_type: Optional[str] = Query(None, description="Filter by device type"),
     site_code: Optional[str] = Query(None, description="Filter by site code"),
@@ -110,100 +265,68 @@ async def list_hosts(
     if edge_switch_id:
         query = query.filter(Host.edge_switch_id == edge_switch_id)
 
-    total = query.count()
-    hosts = query.order_by(Host.last_seen.desc()).offset(skip).limit(limit).all()
-
-    # Enrich with switch/port names
-    items = []
-    for host in hosts:
-        host_dict = {
-            "id": host.id,
-            "mac_address": host.mac_address,
-            "ip_address": host.ip_address,
-            "hostname": host.hostname,
-            "vendor_oui": host.vendor_oui,
-            "vendor_name": host.vendor_name,
-            "device_type": host.device_type,
-            "device_model": host.device_model,
-            "os_type": host.os_type,
-            "edge_switch_id": host.edge_switch_id,
-            "edge_switch_hostname": None,
-            "edge_switch_ip": None,
-            "edge_port_id": host.edge_port_id,
-            "edge_port_name": None,
-            "vlan_id": host.vlan_id,
-            "vrf": host.vrf,
-            "site_code": host.site_code,
-            "is_infrastructure": host.is_infrastructure,
-            "is_virtual": host.is_virtual,
-            "is_critical": host.is_critical,
-            "discovery_attempted": host.discovery_attempted,
-            "discovery_result": host.discovery_result,
-            "first_seen": host.first_seen,
-            "last_seen": host.last_seen,
-            "is_active": host.is_active,
-            "notes": host.notes
-        }
-
-        # Get switch info
-        if host.edge_switch_id:
-            switch = db.query(Switch).filter(Switch.id == host.edge_switch_id).first()
-            if switch:
-                host_dict["edge_switch_hostname"] = switch.hostname
-                host_dict["edge_switch_ip"] = switch.ip_address
-
-        # Get port info
-        if host.edge_port_id:
-            port = db.query(Port).filter(Port.id == host.edge_port_id).first()
-            if port:
-                host_dict["edge_port_name"] = port.port_name
-
-        items.append(HostResponse(**host_dict))
-
-    return HostListResponse(items=items, total=total)
+    # Page and filtered total in one round-trip: COUNT(*) OVER () is
+    # evaluated before LIMIT/OFFSET. Edge switch/port names are joined in.
+    rows = (
+        query.with_entities(*_HOST_LIST_COLUMNS, func.count().over().label("total"))
+        .outerjoin(Switch, Switch.id == Host.edge_switch_id)
+        .outerjoin(Port, Port.id == Host.edge_port_id)
+        .order_by(Host.last_seen.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+    if rows:
+        total = rows[0].total
+    else:
+        # Page past the end: no row to carry the window value
+        total = query.count()
+
+    # Returned as a Response so FastAPI skips response_model re-validation
+    return ORJSONResponse({
+        "items": [
+            {key: value for key, value in row._mapping.items() if key != "total"}
+            for row in rows
+        ],
+        "total": total,
+    })
 
 
 @router.get("/stats", response_model=HostStats)
-async def get_host_stats(db: Session = Depends(get_db)):
+def get_host_stats(db: Session = Depends(get_db)):
     """Get host statistics."""
-    total = db.query(func.count(Host.id)).scalar() or 0
-    active = db.query(func.count(Host.id)).filter(Host.is_active == True).scalar() or 0
-    infrastructure = db.query(func.count(Host.id)).filter(Host.is_infrastructure == True).scalar() or 0
-    virtual = db.query(func.count(Host.id)).filter(Host.is_virtual == True).scalar() or 0
-    critical = db.query(func.count(Host.id)).filter(Host.is_critical == True).scalar() or 0
-
-    # By device type
-    type_counts = db.query(
-        Host.device_type, func.count(Host.id)
-    ).group_by(Host.device_type).all()
-    by_type = {t or "unknown": c for t, c in type_counts}
-
-    # By vendor (top 10)
-    vendor_counts = db.query(
-        Host.vendor_name, func.count(Host.id)
-    ).group_by(Host.vendor_name).order_by(func.count(Host.id).desc()).limit(10).all()
-    by_vendor = {v or "unknown": c for v, c in vendor_counts}
-
-    # By site
-    site_counts = db.query(
-        Host.site_code, func.count(Host.id)
-    ).group_by(Host.site_code).all()
-    by_site = {s or "unknown": c for s, c in site_counts}
-
-    return HostStats(
-        total_hosts=total,
-        active_hosts=active,
-        infrastructure_devices=infrastructure,
-        virtual_devices=virtual,
-        critical_devices=critical,
+    with _host_stats_cache_lock:
+        cached = _host_stats_cache.get("stats")
+    if cached is not None:
+        return cached
+
+    # Counters are kept up to date in host_stats_rollup by every host write
+    rollup = _load_host_stats(db)
+    counters = rollup["counter"]
+
+    by_type = {t or "unknown": c for t, c in rollup["device_type"].items()}
+    top_vendors = sorted(rollup["vendor"].items(), key=lambda item: item[1], reverse=True)[:10]
+    by_vendor = {v or "unknown": c for v, c in top_vendors}
+    by_site = {s or "unknown": c for s, c in rollup["site"].items()}
+
+    stats = HostStats(
+        total_hosts=counters.get("total", 0),
+        active_hosts=counters.get("active", 0),
+        infrastructure_devices=counters.get("infrastructure", 0),
+        virtual_devices=counters.get("virtual", 0),
+        critical_devices=counters.get("critical", 0),
         by_device_type=by_type,
         by_vendor=by_vendor,
         by_site=by_site
     )
+    with _host_stats_cache_lock:
+        _host_stats_cache["stats"] = stats
+    return stats
 
 
 @router.get("/sync", response_model=dict)
-async def sync_hosts_from_macs(db: Session = Depends(get_db)):
+def sync_hosts_from_macs(db: Session = Depends(get_db)):
     """Synchronize hosts table from MAC addresses and locations.
 
     This creates/updates Host records based on current MAC address data.
@@ -211,62 +334,85 @@ async def sync_hosts_from_macs(db: Session = Depends(get_db)):
     created = 0
     updated = 0
 
-    # Get all MAC addresses with their current locations
-    macs_with_locations = db.query(MacAddress, MacLocation).outerjoin(
+    # MAC addresses with their current location, existing host and switch
+    # site in a single pass
+    rows = db.query(
+        MacAddress.mac_address,
+        MacAddress.vendor_oui,
+        MacAddress.vendor_name,
+        MacAddress.device_type,
+        MacAddress.first_seen,
+        MacAddress.last_seen,
+        MacAddress.is_active,
+        MacLocation.id.label("location_id"),
+        MacLocation.ip_address,
+        MacLocation.hostname,
+        MacLocation.switch_id,
+        MacLocation.port_id,
+        MacLocation.vlan_id,
+        Switch.site_code,
+        Host.id.label("host_id"),
+    ).outerjoin(
         MacLocation, (MacAddress.id == MacLocation.mac_id) & (MacLocation.is_current == True)
+    ).outerjoin(
+        Switch, Switch.id == MacLocation.switch_id
+    ).outerjoin(
+        Host, Host.mac_address == MacAddress.mac_address
     ).all()
 
-    for mac, location in macs_with_locations:
-        # Check if host exists
-        host = db.query(Host).filter(Host.mac_address == mac.mac_address).first()
+    # Pending rows keyed by MAC (inserts) or host id (updates); a MAC with
+    # several current locations keeps the last one, as before
+    to_insert: dict[str, dict] = {}
+    to_update: dict[int, dict] = {}
 
-        if not host:
+    for row in rows:
+        if row.host_id is None and row.mac_address not in to_insert:
             # Create new host
-            host = Host(
-                mac_address=mac.mac_address,
-                vendor_oui=mac.vendor_oui,
-                vendor_name=mac.vendor_name,
-                device_type=mac.device_type,
-                first_seen=mac.first_seen,
-                last_seen=mac.last_seen,
-                is_active=mac.is_active
-            )
-
-            # Detect virtual by OUI
-            if mac.vendor_name and any(v in mac.vendor_name.lower() for v in ['vmware', 'virtual', 'hyperv', 'kvm', 'xen']):
-                host.is_virtual = True
-
-            # Detect infrastructure by OUI
-            if mac.vendor_name and any(v in mac.vendor_name.lower() for v in ['cisco', 'huawei', 'juniper', 'arista', 'extreme', 'hp networking', 'dell networking']):
-                host.is_infrastructure = True
-
-            db.add(host)
-            db.flush()  # Flush immediately to avoid duplicates
+            values = {
+                "mac_address": row.mac_address,
+                "vendor_oui": row.vendor_oui,
+                "vendor_name": row.vendor_name,
+                "device_type": row.device_type,
+                "first_seen": row.first_seen,
+                "last_seen": row.last_seen,
+                "is_active": row.is_active,
+                # Detect virtual / infrastructure devices by OUI vendor
+                "is_virtual": bool(row.vendor_name and _VIRTUAL_VENDOR_RE.search(row.vendor_name)),
+                "is_infrastructure": bool(row.vendor_name and _INFRA_VENDOR_RE.search(row.vendor_name)),
+            }
+
+            to_insert[row.mac_address] = values
             created += 1
         else:
             # Update existing host
-            host.vendor_oui = mac.vendor_oui
-            host.vendor_name = mac.vendor_name
-            if mac.device_type:
-                host.device_type = mac.device_type
-            host.last_seen = mac.last_seen
-            host.is_active = mac.is_active
+            if row.host_id is None:
+                values = to_insert[row.mac_address]
+            else:
+                values = to_update.setdefault(row.host_id, {"id": row.host_id})
+            values["vendor_oui"] = row.vendor_oui
+            values["vendor_name"] = row.vendor_name
+            if row.device_type:
+                values["device_type"] = row.device_type
+            values["last_seen"] = row.last_seen
+            values["is_active"] = row.is_active
             updated += 1
 
         # Update location from MacLocation if available
-        if location:
-            host.ip_address = location.ip_address
-            host.hostname = location.hostname
-            host.edge_switch_id = location.switch_id
-            host.edge_port_id = location.port_id
-            host.vlan_id = location.vlan_id
-
-            # Get site code from switch
-            switch = db.query(Switch).filter(Switch.id == location.switch_id).first()
-            if switch:
-                host.site_code = switch.site_code
-
+        if row.location_id is not None:
+            values["ip_address"] = row.ip_address
+            values["hostname"] = row.hostname
+            values["edge_switch_id"] = row.switch_id
+            values["edge_port_id"] = row.port_id
+            values["vlan_id"] = row.vlan_id
+
+            # Site code from switch
+            if row.switch_id is not None:
+                values["site_code"] = row.site_code
+
+    db.bulk_insert_mappings(Host, list(to_insert.values()))
+    db.bulk_update_mappings(Host, list(to_update.values()))
     db.commit()
+    refresh_host_stats(db)
 
     return {
         "created": created,
@@ -276,64 +422,33 @@ async def sync_hosts_from_macs(db: Session = Depends(get_db)):
 
 
 @router.get("/{host_id}", response_model=HostResponse)
-async def get_host(host_id: int, db: Session = Depends(get_db)):
+def get_host(host_id: int, db: Session = Depends(get_db)):
     """Get a specific host by ID."""
-    host = db.query(Host).filter(Host.id == host_id).first()
+    host = (
+        db.query(Host)
+        .options(joinedload(Host.edge_switch), joinedload(Host.edge_port))
+        .filter(Host.id == host_id)
+        .first()
+    )
     if not host:
         raise HTTPException(status_code=404, detail="Host not found")
 
-    host_dict = {
-        "id": host.id,
-        "mac_address": host.mac_address,
-        "ip_address": host.ip_address,
-        "hostname": host.hostname,
-        "vendor_oui": host.vendor_oui,
-        "vendor_name": host.vendor_name,
-        "device_type": host.device_type,
-        "device_model": host.device_model,
-        "os_type": host.os_type,
-        "edge_switch_id": host.edge_switch_id,
-        "edge_switch_hostname": None,
-        "edge_switch_ip": None,
-        "edge_port_id": host.edge_port_id,
-        "edge_port_name": None,
-        "vlan_id": host.vlan_id,
-        "vrf": host.vrf,
-        "site_code": host.site_code,
-        "is_infrastructure": host.is_infrastructure,
-        "is_virtual": host.is_virtual,
-        "is_critical": host.is_critical,
-        "discovery_attempted": host.discovery_attempted,
-        "discovery_result": host.discovery_result,
-        "first_seen": host.first_seen,
-        "last_seen": host.last_seen,
-        "is_active": host.is_active,
-        "notes": host.notes
-    }
-
-    # Get switch info
-    if host.edge_switch_id:
-        switch = db.query(Switch).filter(Switch.id == host.edge_switch_id).first()
-        if switch:
-            host_dict["edge_switch_hostname"] = switch.hostname
-            host_dict["edge_switch_ip"] = switch.ip_address
-
-    # Get port info
-    if host.edge_port_id:
-        port = db.query(Port).filter(Port.id == host.edge_port_id).first()
-        if port:
-            host_dict["edge_port_name"] = port.port_name
-
-    return HostResponse(**host_dict)
+    return _host_to_response(host)
 
 
 @router.put("/{host_id}", response_model=HostResponse)
-async def update_host(host_id: int, data: HostUpdate, db: Session = Depends(get_db)):
+def update_host(host_id: int, data: HostUpdate, db: Session = Depends(get_db)):
     """Update host information (user-editable fields only)."""
-    host = db.query(Host).filter(Host.id == host_id).first()
+    host = (
+        db.query(Host)
+        .options(joinedload(Host.edge_switch), joinedload(Host.edge_port))
+        .filter(Host.id == host_id)
+        .first()
+    )
     if not host:
         raise HTTPException(status_code=404, detail="Host not found")
 
+    stats_before = _host_stats_keys(host)
     if data.hostname is not None:
         host.hostname = data.hostname
     if data.device_type is not None:
@@ -343,21 +458,25 @@ async def update_host(host_id: int, data: HostUpdate, db: Session = Depends(get_
     if data.notes is not None:
         host.notes = data.notes
 
+    _apply_host_stats_delta(db, stats_before, _host_stats_keys(host))
     db.commit()
+    clear_host_stats_cache()
     db.refresh(host)
 
-    return await get_host(host_id, db)
+    return _host_to_response(host)
 
 
 @router.delete("/{host_id}")
-async def delete_host(host_id: int, db: Session = Depends(get_db)):
+def delete_host(host_id: int, db: Session = Depends(get_db)):
     """Delete a host record."""
     host = db.query(Host).filter(Host.id == host_id).first()
     if not host:
         raise HTTPException(status_code=404, detail="Host not found")
 
+    _apply_host_stats_delta(db, _host_stats_keys(host), [])
     db.delete(host)
     db.commit()
+    clear_host_stats_cache()
 
     return {"message": "Host deleted successfully"}
 
@@ -387,45 +506,20 @@ class ARPScanRequest(BaseModel):
     vlan_id: Optional[int] = None
 
 
-@router.post("/discovery/ping-sweep", response_model=PingSweepResult)
-async def ping_sweep(request: PingSweepRequest, db: Session = Depends(get_db)):
-    """
-    Perform a ping sweep on a subnet to discover active hosts.
-
-    This actively probes IP addresses and updates the host table
-    with discovery results.
-    """
+async def _probe_with_system_ping(ips: list[str], timeout: int, concurrent: int) -> list[bool]:
+    """Ping each address with the OS ping binary (one process per address)."""
     import asyncio
-    import ipaddress
-    import subprocess
     import platform
 
-    try:
-        network = ipaddress.ip_network(request.subnet, strict=False)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=f"Invalid subnet: {e}")
-
-    hosts_list = list(network.hosts())
-    if len(hosts_list) > 1024:
-        raise HTTPException(status_code=400, detail="Subnet too large (max /22)")
-
     # Platform-specific ping command
     is_windows = platform.system().lower() == "windows"
     ping_cmd = ["ping", "-n" if is_windows else "-c", "1",
-                "-w" if is_windows else "-W", str(request.timeout * 1000 if is_windows else request.timeout)]
-
-    results = []
-    hosts_up = 0
-    hosts_down = 0
-    new_hosts = 0
-    updated_hosts = 0
+                "-w" if is_windows else "-W", str(timeout * 1000 if is_windows else timeout)]
 
     # Semaphore to limit concurrency
-    semaphore = asyncio.Semaphore(request.concurrent)
-
-    async def ping_host(ip: str):
-        nonlocal hosts_up, hosts_down, new_hosts, updated_hosts
+    semaphore = asyncio.Semaphore(concurrent)
 
+    async def ping_host(ip: str) -> bool:
         async with semaphore:
             try:
                 proc = await asyncio.create_subprocess_exec(
@@ -433,62 +527,165 @@ async def ping_sweep(request: PingSweepRequest, db: Session = Depends(get_db)):
                     stdout=asyncio.subprocess.DEVNULL,
                     stderr=asyncio.subprocess.DEVNULL
                 )
-                await asyncio.wait_for(proc.wait(), timeout=request.timeout + 2)
-                is_up = proc.returncode == 0
-            except asyncio.TimeoutError:
-                is_up = False
+                await asyncio.wait_for(proc.wait(), timeout=timeout + 2)
+                return proc.returncode == 0
             except Exception:
-                is_up = False
+                return False
 
-            if is_up:
-                hosts_up += 1
-            else:
-                hosts_down += 1
-
-            # Update host record if IP exists
-            host = db.query(Host).filter(Host.ip_address == ip).first()
-            if host:
-                host.discovery_attempted = True
-                host.discovery_result = "reachable" if is_up else "unreachable"
-                host.last_seen = datetime.utcnow() if is_up else host.last_seen
-                host.is_active = is_up
-                updated_hosts += 1
-            elif is_up:
-                # Create placeholder host for discovered IP without MAC
-                new_host = Host(
-                    mac_address=f"DISCOVERED-{ip.replace('.', '-')}",
-                    ip_address=ip,
-                    discovery_attempted=True,
-                    discovery_result="reachable",
-                    first_seen=datetime.utcnow(),
-                    last_seen=datetime.utcnow(),
-                    is_active=True,
-                )
-                db.add(new_host)
-                new_hosts += 1
+    return await asyncio.gather(*(ping_host(ip) for ip in ips))
 
-            results.append({
-                "ip": ip,
-                "status": "up" if is_up else "down"
+
+async def _probe_hosts(ips: list[str], timeout: int, concurrent: int) -> list[bool]:
+    """Send one ICMP echo to each address; returns reachability in input order."""
+    import os
+    from icmplib import async_multiping
+    from icmplib.exceptions import SocketPermissionError
+
+    # Raw sockets need root; otherwise use the kernel's unprivileged ICMP
+    # sockets (the flag is ignored on Windows)
+    privileged = os.name != "posix" or os.geteuid() == 0
+    try:
+        probes = await async_multiping(
+            ips,
+            count=1,
+            timeout=timeout,
+            concurrent_tasks=concurrent,
+            privileged=privileged,
+        )
+    except SocketPermissionError:
+        # ICMP sockets not allowed for this user (net.ipv4.ping_group_range)
+        return await _probe_with_system_ping(ips, timeout, concurrent)
+
+    return [probe.is_alive for probe in probes]
+
+
+def _store_ping_results(db: Session, ips: list[str], reachability: list[bool]) -> tuple[int, int]:
+    """Record ping sweep results on the host table; returns (new_hosts, updated_hosts)."""
+    # Existing hosts for the swept addresses in one query (first host per IP)
+    existing: dict[str, int] = {}
+    for host_id, ip_address in (
+        db.query(Host.id, Host.ip_address)
+        .filter(Host.ip_address.in_(ips))
+        .order_by(Host.id)
+    ):
+        existing.setdefault(ip_address, host_id)
+
+    now = datetime.utcnow()
+    updates = []
+    inserts = []
+
+    for ip, is_up in zip(ips, reachability):
+        # Update host record if IP exists
+        host_id = existing.get(ip)
+        if host_id is not None:
+            values = {
+                "id": host_id,
+                "discovery_attempted": True,
+                "discovery_result": "reachable" if is_up else "unreachable",
+                "is_active": is_up,
+            }
+            if is_up:
+                values["last_seen"] = now
+            updates.append(values)
+        elif is_up:
+            # Create placeholder host for discovered IP without MAC
+            inserts.append({
+                "mac_address": f"DISCOVERED-{ip.replace('.', '-')}",
+                "ip_address": ip,
+                "discovery_attempted": True,
+                "discovery_result": "reachable",
+                "first_seen": now,
+                "last_seen": now,
+                "is_active": True,
             })
 
+    db.bulk_update_mappings(Host, updates)
+    db.bulk_insert_mappings(Host, inserts)
+    db.commit()
+    refresh_host_stats(db)
+    return len(inserts), len(updates)
+
+
+@router.post("/discovery/ping-sweep", response_model=PingSweepResult)
+async def ping_sweep(request: PingSweepRequest, db: Session = Depends(get_db)):
+    """
+    Perform a ping sweep on a subnet to discover active hosts.
+
+    This actively probes IP addresses and updates the host table
+    with discovery results.
+    """
+    import ipaddress
+
+    try:
+        network = ipaddress.ip_network(request.subnet, strict=False)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid subnet: {e}")
+
+    hosts_list = list(network.hosts())
+    if len(hosts_list) > 1024:
+        raise HTTPException(status_code=400, detail="Subnet too large (max /22)")
+
     # Run ping sweep
-    tasks = [ping_host(str(ip)) for ip in hosts_list]
-    await asyncio.gather(*tasks)
+    ips = [str(ip) for ip in hosts_list]
+    reachability = await _probe_hosts(ips, request.timeout, request.concurrent)
 
-    db.commit()
+    # Blocking database work runs in the threadpool, off the event loop
+    new_hosts, updated_hosts = await run_in_threadpool(
+        _store_ping_results, db, ips, reachability
+    )
+
+    hosts_up = sum(reachability)
+    results = [
+        {"ip": ip, "status": "up" if is_up else "down"}
+        for ip, is_up in zip(ips, reachability)
+    ]
 
     return PingSweepResult(
         subnet=request.subnet,
         total_scanned=len(hosts_list),
         hosts_up=hosts_up,
-        hosts_down=hosts_down,
+        hosts_down=len(ips) - hosts_up,
         new_hosts=new_hosts,
         updated_hosts=updated_hosts,
         results=results[:100]  # Limit results in response
     )
 
 
+def _store_arp_entries(db: Session, arp_entries: list[dict], vlan_id: Optional[int]) -> int:
+    """Apply ARP MAC-IP mappings to known hosts; returns the number of entries applied."""
+    entries = [
+        (entry["mac_address"].upper(), entry["ip_address"], entry.get("vlan_id"))
+        for entry in arp_entries
+        if entry.get("mac_address") and entry.get("ip_address")
+        and (not vlan_id or entry.get("vlan_id") == vlan_id)
+    ]
+
+    # Known hosts for all ARP MACs in one query
+    host_ids = dict(
+        db.query(Host.mac_address, Host.id)
+        .filter(Host.mac_address.in_({mac for mac, _, _ in entries}))
+    )
+
+    now = datetime.utcnow()
+    updates = {}
+    updated = 0
+    for mac, ip, vlan in entries:
+        host_id = host_ids.get(mac)
+        if host_id is None:
+            continue
+        # Later entries for the same MAC win, as with per-entry updates
+        values = updates.setdefault(host_id, {"id": host_id})
+        values.update(ip_address=ip, last_seen=now, is_active=True)
+        if vlan:
+            values["vlan_id"] = vlan
+        updated += 1
+
+    db.bulk_update_mappings(Host, list(updates.values()))
+    db.commit()
+    refresh_host_stats(db)
+    return updated
+
+
 @router.post("/discovery/arp-scan")
 async def arp_scan(request: ARPScanRequest, db: Session = Depends(get_db)):
     """
@@ -497,9 +694,7 @@ async def arp_scan(request: ARPScanRequest, db: Session = Depends(get_db)):
     This retrieves MAC-IP mappings from the switch's ARP cache
     and updates the host table.
     """
-    from app.services.discovery.snmp_discovery import SNMPDiscoveryService
-
-    switch = db.query(Switch).filter(Switch.id == request.switch_id).first()
+    switch = await run_in_threadpool(db.get, Switch, request.switch_id)
     if not switch:
         raise HTTPException(status_code=404, detail="Switch not found")
 
@@ -512,45 +707,28 @@ async def arp_scan(request: ARPScanRequest, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"SNMP error: {str(e)}")
 
-    updated = 0
-    for entry in arp_entries:
-        mac = entry.get("mac_address")
-        ip = entry.get("ip_address")
-        vlan = entry.get("vlan_id")
+    # Read before the commit expires the switch
+    switch_id, switch_hostname = switch.id, switch.hostname
 
-        if not mac or not ip:
-            continue
-
-        if request.vlan_id and vlan != request.vlan_id:
-            continue
-
-        # Find or create host
-        host = db.query(Host).filter(Host.mac_address == mac.upper()).first()
-        if host:
-            host.ip_address = ip
-            if vlan:
-                host.vlan_id = vlan
-            host.last_seen = datetime.utcnow()
-            host.is_active = True
-            updated += 1
-
-    db.commit()
+    # Blocking database work runs in the threadpool, off the event loop
+    updated = await run_in_threadpool(_store_arp_entries, db, arp_entries, request.vlan_id)
 
     return {
-        "switch_id": switch.id,
-        "switch_hostname": switch.hostname,
+        "switch_id": switch_id,
+        "switch_hostname": switch_hostname,
         "arp_entries_found": len(arp_entries),
         "hosts_updated": updated,
     }
 
 
 @router.get("/discovery/status")
-async def discovery_status(db: Session = Depends(get_db)):
+def discovery_status(db: Session = Depends(get_db)):
     """Get active discovery statistics."""
-    total = db.query(func.count(Host.id)).scalar()
-    attempted = db.query(func.count(Host.id)).filter(Host.discovery_attempted == True).scalar()
-    reachable = db.query(func.count(Host.id)).filter(Host.discovery_result == "reachable").scalar()
-    unreachable = db.query(func.count(Host.id)).filter(Host.discovery_result == "unreachable").scalar()
+    rollup = _load_host_stats(db)
+    total = rollup["counter"].get("total", 0)
+    attempted = rollup["counter"].get("discovery_attempted", 0)
+    reachable = rollup["discovery_result"].get("reachable", 0)
+    unreachable = rollup["discovery_result"].get("unreachable", 0)
 
     return {
         "total_hosts": total,
@@ -1,4 +1,5 @@
 """Intent Verification API endpoints (IP Fabric-like compliance checks)."""
+import heapq
 from typing import List, Optional
 from datetime import datetime
 
@@ -7,6 +8,7 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
+from app.services.intent.intent_scheduler import get_intent_scheduler
 from app.services.intent_verification import (
     IntentVerificationService,
     CheckSeverity,
@@ -15,6 +17,13 @@ from app.services.intent_verification import (
 
 router = APIRouter(tags=["intent-verification"])
 
+# Ordering of failed checks in the summary's top issues (lower = more severe)
+SEVERITY_RANK = {
+    CheckSeverity.CRITICAL: 0,
+    CheckSeverity.ERROR: 1,
+    CheckSeverity.WARNING: 2,
+}
+
 
 class CheckResultResponse(BaseModel):
     check_id: str
@@ -55,23 +64,29 @@ def list_available_checks(db: Session = Depends(get_db)):
 
 @router.post("/run", response_model=IntentSummary)
 def run_all_checks(db: Session = Depends(get_db)):
-    """Run all intent verification checks and return summary."""
-    service = IntentVerificationService(db)
-    results = service.run_all_checks()
+    """Run all intent verification checks and return summary.
 
-    # Build summary
-    passed = sum(1 for r in results if r.passed)
-    failed = len(results) - passed
+    A run completed in the last minute (by this endpoint, /summary or the
+    scheduler) is reused instead of running the whole suite again.
+    """
+    service = IntentVerificationService(db)
+    run_at, results = service.get_recent_results()
 
+    # Build summary (single pass)
+    passed = 0
     by_severity = {}
     by_category = {}
 
     for r in results:
+        if r.passed:
+            passed += 1
         sev = r.severity.value
         cat = r.category.value
         by_severity[sev] = by_severity.get(sev, 0) + 1
         by_category[cat] = by_category.get(cat, 0) + 1
 
+    failed = len(results) - passed
+
     checks = [
         CheckResultResponse(
             check_id=r.check_id,
@@ -96,7 +111,7 @@ def run_all_checks(db: Session = Depends(get_db)):
         by_severity=by_severity,
         by_category=by_category,
         checks=checks,
-        run_at=datetime.utcnow()
+        run_at=run_at
     )
 
 
@@ -131,12 +146,25 @@ def get_quick_summary(db: Session = Depends(get_db)):
 
     This is a lighter-weight endpoint for dashboard widgets.
     """
+    # Shares the last full run with /run and the scheduler
     service = IntentVerificationService(db)
-    results = service.run_all_checks()
+    _, results = service.get_recent_results()
 
-    critical = sum(1 for r in results if not r.passed and r.severity == CheckSeverity.CRITICAL)
-    errors = sum(1 for r in results if not r.passed and r.severity == CheckSeverity.ERROR)
-    warnings = sum(1 for r in results if not r.passed and r.severity == CheckSeverity.WARNING)
+    # Count passes and failures per severity in one pass
+    passed = 0
+    critical = errors = warnings = 0
+    failed = []
+    for r in results:
+        if r.passed:
+            passed += 1
+            continue
+        failed.append(r)
+        if r.severity == CheckSeverity.CRITICAL:
+            critical += 1
+        elif r.severity == CheckSeverity.ERROR:
+            errors += 1
+        elif r.severity == CheckSeverity.WARNING:
+            warnings += 1
 
     # Calculate health score (0-100)
     total_weight = len(results) * 10
@@ -146,7 +174,7 @@ def get_quick_summary(db: Session = Depends(get_db)):
     return {
         "health_score": round(health_score, 1),
         "total_checks": len(results),
-        "passed": sum(1 for r in results if r.passed),
+        "passed": passed,
         "issues": {
             "critical": critical,
             "errors": errors,
@@ -158,13 +186,8 @@ def get_quick_summary(db: Session = Depends(get_db)):
                 "severity": r.severity.value,
                 "message": r.message
             }
-            for r in sorted(results, key=lambda x: (
-                0 if x.severity == CheckSeverity.CRITICAL else
-                1 if x.severity == CheckSeverity.ERROR else
-                2 if x.severity == CheckSeverity.WARNING else 3
-            ))
-            if not r.passed
-        ][:5]
+            for r in heapq.nsmallest(5, failed, key=lambda x: SEVERITY_RANK.get(x.severity, 3))
+        ]
     }
 
 
@@ -178,7 +201,6 @@ class SchedulerConfig(BaseModel):
 @router.get("/scheduler/status")
 def get_scheduler_status():
     """Get intent check scheduler status."""
-    from app.services.intent.intent_scheduler import get_intent_scheduler
     scheduler = get_intent_scheduler()
     return scheduler.get_status()
 
@@ -186,7 +208,6 @@ def get_scheduler_status():
 @router.post("/scheduler/configure")
 def configure_scheduler(config: SchedulerConfig):
     """Configure the intent check scheduler."""
-    from app.services.intent.intent_scheduler import get_intent_scheduler
     scheduler = get_intent_scheduler()
 
     if config.enabled:
@@ -200,7 +221,6 @@ def configure_scheduler(config: SchedulerConfig):
 @router.post("/scheduler/run-now")
 def run_scheduler_now():
     """Trigger an immediate intent check run."""
-    from app.services.intent.intent_scheduler import get_intent_scheduler
     scheduler = get_intent_scheduler()
     result = scheduler.run_now()
     return {
@@ -1,15 +1,26 @@
 """MAC Path API endpoint for topology highlighting."""
-from typing import List, Optional
+import threading
+from array import array
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
+from cachetools import LRUCache
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, computed_field
+from sqlalchemy import delete, func, insert
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
-from app.db.models import Switch, TopologyLink, Port, MacLocation, MacAddress
+from app.db.models import Switch, SwitchPath, TopologyLink, Port, MacLocation, MacAddress
 
 router = APIRouter()
 
+# Link graph keyed by the topology version token (see _topology_version);
+# any added, removed or re-seen link changes the token and retires the entry
+_link_graph_cache: LRUCache = LRUCache(maxsize=2)
+_link_graph_cache_lock = threading.Lock()
+
 
 class MacPathNode(BaseModel):
     """Node in MAC path."""
@@ -29,134 +40,391 @@ class MacPathResponse(BaseModel):
     endpoint_switch_hostname: str
     endpoint_port: str
     path: List[MacPathNode]
-    path_node_ids: List[int]
     path_edge_keys: List[str]
 
+    @computed_field
+    @property
+    def path_node_ids(self) -> List[int]:
+        """Switch ids along path, for clients highlighting nodes by id."""
+        return [node.switch_id for node in self.path]
 
-@router.get("/{mac_address}", response_model=MacPathResponse)
-def get_mac_path(mac_address: str, db: Session = Depends(get_db)):
+
+class MacPathBatchRequest(BaseModel):
+    """Request for the paths of several MAC addresses."""
+    mac_addresses: List[str]
+
+
+def _topology_version(db: Session) -> Tuple:
+    """Cheap token that changes whenever topology_links changes."""
+    return tuple(db.query(
+        func.count(TopologyLink.id),
+        func.max(TopologyLink.id),
+        func.max(TopologyLink.last_seen),
+    ).one())
+
+
+class _LinkGraph:
+    """Switch adjacency in CSR layout over dense switch indexes.
+
+    The neighbors of node i are indices[indptr[i]:indptr[i + 1]], and
+    edge_links holds, for each of those entries, the position in links of
+    the topology link that connects them. Links are plain rows (id,
+    local/remote switch, local port), not ORM objects.
     """
-    Get the network path from core to endpoint for a MAC address.
-    Returns the path of switches from core -> distribution -> access.
+
+    def __init__(self, links: list):
+        self.links = links
+        self.node_ids: List[int] = sorted(
+            {link.local_switch_id for link in links} | {link.remote_switch_id for link in links}
+        )
+        self.node_index: Dict[int, int] = {sid: i for i, sid in enumerate(self.node_ids)}
+        index = self.node_index
+
+        # Degree per node, prefix-summed into row offsets
+        indptr = array("i", bytes(4 * (len(self.node_ids) + 1)))
+        for link in links:
+            indptr[index[link.local_switch_id] + 1] += 1
+            indptr[index[link.remote_switch_id] + 1] += 1
+        for i in range(len(self.node_ids)):
+            indptr[i + 1] += indptr[i]
+
+        # Fill in link order, so each row keeps the order links were loaded in
+        indices = array("i", bytes(4 * indptr[-1]))
+        edge_links = array("i", bytes(4 * indptr[-1]))
+        fill = array("i", indptr[:-1])
+        for pos, link in enumerate(links):
+            u = index[link.local_switch_id]
+            v = index[link.remote_switch_id]
+            indices[fill[u]] = v
+            edge_links[fill[u]] = pos
+            fill[u] += 1
+            indices[fill[v]] = u
+            edge_links[fill[v]] = pos
+            fill[v] += 1
+
+        self.indptr = indptr
+        self.indices = indices
+        self.edge_links = edge_links
+
+        # Core -> endpoint paths, keyed by (endpoint switch id, core switch ids)
+        self._core_paths: LRUCache = LRUCache(maxsize=256)
+        self._core_paths_lock = threading.Lock()
+
+    def degree(self, i: int) -> int:
+        return self.indptr[i + 1] - self.indptr[i]
+
+    def core_path(self, endpoint_id: int, core_ids: frozenset) -> Tuple[Tuple[int, ...], Tuple]:
+        """Switch ids and links from the core down to endpoint_id, memoized."""
+        key = (endpoint_id, core_ids)
+        with self._core_paths_lock:
+            result = self._core_paths.get(key)
+        if result is None:
+            result = self._find_core_path(endpoint_id, core_ids)
+            with self._core_paths_lock:
+                self._core_paths[key] = result
+        return result
+
+    def _find_core_path(self, endpoint_id: int, core_ids: frozenset) -> Tuple[Tuple[int, ...], Tuple]:
+        source = self.node_index.get(endpoint_id)
+        if source is None:
+            # Isolated endpoint: no topology link reaches it
+            return (endpoint_id,), ()
+
+        cores = [self.node_index[sid] for sid in core_ids if sid in self.node_index]
+        if source in cores:
+            return (endpoint_id,), ()
+        if cores:
+            path = self._search_to_cores(source, cores)
+            if path is not None:
+                return path
+
+        # No reachable core switch: fall back to the reachable switch with
+        # most connections (lowest switch id on ties; node indexes follow
+        # switch id order)
+        parent, via, order = self._bfs(source)
+        core = max(order, key=lambda i: (self.degree(i), -i))
+        if core == source:
+            return (endpoint_id,), ()
+
+        # The BFS tree is rooted at the endpoint, so walking parents up from
+        # the core yields the core -> endpoint path directly
+        nodes, link_positions = self._walk(parent, via, core)
+        return (
+            tuple(self.node_ids[i] for i in nodes),
+            tuple(self.links[pos] for pos in link_positions),
+        )
+
+    def _bfs(self, source: int) -> Tuple[array, array, List[int]]:
+        """
+        BFS tree from source over node indexes: parent node and link position
+        per node (-1 for the root and unreached nodes), and the visit order.
+        """
+        indptr, indices, edge_links = self.indptr, self.indices, self.edge_links
+        n = len(self.node_ids)
+        visited = bytearray(n)
+        parent = array("i", [-1]) * n
+        via = array("i", [-1]) * n
+        visited[source] = 1
+        order = [source]
+        queue = deque(order)
+        while queue:
+            current = queue.popleft()
+            for k in range(indptr[current], indptr[current + 1]):
+                neighbor = indices[k]
+                if not visited[neighbor]:
+                    visited[neighbor] = 1
+                    parent[neighbor] = current
+                    via[neighbor] = edge_links[k]
+                    order.append(neighbor)
+                    queue.append(neighbor)
+        return parent, via, order
+
+    def _search_to_cores(self, source: int, cores: List[int]) -> Optional[Tuple[Tuple[int, ...], Tuple]]:
+        """
+        Shortest core -> source path to the nearest core, or None if no core
+        is reachable.
+
+        Searches from the endpoint and from all cores at once, expanding the
+        smaller frontier one full level at a time until the two meet, so only
+        the switches near the endpoint-core path are visited.
+        """
+        indptr, indices, edge_links = self.indptr, self.indices, self.edge_links
+        n = len(self.node_ids)
+        # Search side that reached each node: 0 = none, 1 = endpoint, 2 = core.
+        # A node belongs to one side, so both share the parent arrays.
+        side = bytearray(n)
+        parent = array("i", [-1]) * n
+        via = array("i", [-1]) * n
+        side[source] = 1
+        for core in cores:
+            side[core] = 2
+        frontier_fwd = [source]
+        frontier_bwd = list(cores)
+
+        while frontier_fwd and frontier_bwd:
+            forward = len(frontier_fwd) <= len(frontier_bwd)
+            frontier, mark = (frontier_fwd, 1) if forward else (frontier_bwd, 2)
+
+            next_frontier = []
+            for current in frontier:
+                for k in range(indptr[current], indptr[current + 1]):
+                    neighbor = indices[k]
+                    reached = side[neighbor]
+                    if reached == mark:
+                        continue
+                    if reached:
+                        # The searches meet on link k: stitch core -> link and
+                        # link -> endpoint
+                        core_end, endpoint_end = (neighbor, current) if forward else (current, neighbor)
+                        core_half, core_links = self._walk(parent, via, core_end)
+                        end_half, end_links = self._walk(parent, via, endpoint_end)
+                        core_half.reverse()
+                        core_links.reverse()
+                        return (
+                            tuple(self.node_ids[i] for i in core_half + end_half),
+                            tuple(
+                                self.links[pos]
+                                for pos in core_links + [edge_links[k]] + end_links
+                            ),
+                        )
+                    side[neighbor] = mark
+                    parent[neighbor] = current
+                    via[neighbor] = edge_links[k]
+                    next_frontier.append(neighbor)
+
+            if forward:
+                frontier_fwd = next_frontier
+            else:
+                frontier_bwd = next_frontier
+
+        return None
+
+    @staticmethod
+    def _walk(parent: array, via: array, node: int) -> Tuple[List[int], List[int]]:
+        """Follow parent from node up to its root: nodes (node first) and link positions."""
+        nodes = [node]
+        link_positions = []
+        while parent[node] >= 0:
+            link_positions.append(via[node])
+            node = parent[node]
+            nodes.append(node)
+        return nodes, link_positions
+
+
+def _get_link_graph(db: Session, version: Optional[Tuple] = None) -> _LinkGraph:
+    """Return the switch link graph, reused until the topology version changes."""
+    if version is None:
+        version = _topology_version(db)
+    with _link_graph_cache_lock:
+        graph = _link_graph_cache.get(version)
+    if graph is not None:
+        return graph
+
+    links = db.query(
+        TopologyLink.id,
+        TopologyLink.local_switch_id,
+        TopologyLink.remote_switch_id,
+        TopologyLink.local_port_id,
+    ).order_by(TopologyLink.id).all()
+    graph = _LinkGraph(links)
+
+    with _link_graph_cache_lock:
+        _link_graph_cache[version] = graph
+    return graph
+
+
+def _core_switch_ids(db: Session) -> frozenset:
+    return frozenset(sid for (sid,) in db.query(Switch.id).filter(Switch.tier == "core"))
+
+
+def _path_version(version: Tuple, core_ids: frozenset) -> str:
+    """Token stored with materialized paths: topology version plus core switches."""
+    count, max_id, max_seen = version
+    cores = ",".join(str(sid) for sid in sorted(core_ids))
+    return f"{count}:{max_id}:{max_seen}|{cores}"
+
+
+def _path_entry(path_switches: Tuple[int, ...], path_links: Tuple) -> Tuple[list, list, list]:
+    """(switch ids, outgoing port ids, edge keys) of a core -> endpoint path."""
+    path_port_ids = [link.local_port_id for link in path_links]
+
+    # Build edge keys (format: "from-to" for vis.js); an edge key can be
+    # either direction
+    path_edge_keys = [
+        key
+        for link in path_links
+        for key in (
+            f"{link.local_switch_id}-{link.remote_switch_id}",
+            f"{link.remote_switch_id}-{link.local_switch_id}",
+        )
+    ]
+
+    return list(path_switches), path_port_ids, path_edge_keys
+
+
+def refresh_switch_paths(db: Session) -> int:
     """
-    # Normalize MAC address format (support both : and - separators)
-    mac_normalized = mac_address.upper().replace('-', ':')
+    Rebuild the materialized core -> switch path of every switch.
 
-    # Find the MAC address
-    mac = db.query(MacAddress).filter(MacAddress.mac_address == mac_normalized).first()
-    if not mac:
-        raise HTTPException(status_code=404, detail="MAC address non trovato")
+    Returns:
+        Number of paths stored
+    """
+    version = _topology_version(db)
+    core_ids = _core_switch_ids(db)
+    path_version = _path_version(version, core_ids)
+    graph = _get_link_graph(db, version)
+    now = datetime.utcnow()
 
-    # Get current location
-    location = db.query(MacLocation).filter(
-        MacLocation.mac_id == mac.id,
-        MacLocation.is_current == True
-    ).first()
+    rows = []
+    for (switch_id,) in db.query(Switch.id):
+        path_switch_ids, path_port_ids, path_edge_keys = _path_entry(
+            *graph.core_path(switch_id, core_ids)
+        )
+        rows.append({
+            "endpoint_switch_id": switch_id,
+            "topology_version": path_version,
+            "path_switch_ids": path_switch_ids,
+            "path_port_ids": path_port_ids,
+            "path_edge_keys": path_edge_keys,
+            "refreshed_at": now,
+        })
 
-    if not location:
-        raise HTTPException(status_code=404, detail="MAC non ha una posizione corrente")
+    db.execute(delete(SwitchPath))
+    if rows:
+        db.execute(insert(SwitchPath), rows)
+    db.commit()
+    return len(rows)
 
-    # Get endpoint switch and port
-    endpoint_switch = db.query(Switch).filter(Switch.id == location.switch_id).first()
-    endpoint_port = db.query(Port).filter(Port.id == location.port_id).first()
 
-    if not endpoint_switch or not endpoint_port:
-        raise HTTPException(status_code=404, detail="Switch o porta non trovati")
+def _mac_path_query(db: Session):
+    """MAC, current location, endpoint switch and port, and the materialized
+    path of the endpoint switch, in one query."""
+    return (
+        db.query(
+            MacAddress.mac_address,
+            MacAddress.vendor_name,
+            MacLocation.id.label("location_id"),
+            MacLocation.ip_address,
+            Switch,
+            Port.port_name,
+            SwitchPath,
+        )
+        .outerjoin(
+            MacLocation,
+            (MacLocation.mac_id == MacAddress.id) & (MacLocation.is_current == True),
+        )
+        .outerjoin(Switch, Switch.id == MacLocation.switch_id)
+        .outerjoin(Port, Port.id == MacLocation.port_id)
+        .outerjoin(SwitchPath, SwitchPath.endpoint_switch_id == MacLocation.switch_id)
+    )
 
-    # Build the path using BFS from endpoint to all reachable switches via topology links
-    # This traces back through the network topology
+
+def _endpoint_paths(db: Session, rows: list) -> Dict[int, Tuple[list, list, list]]:
+    """
+    Core -> endpoint path of each distinct endpoint switch in rows.
+
+    Uses the materialized path while it matches the current topology and
+    core switches; otherwise traces it over the link graph (CSR adjacency,
+    cached per topology version, with the path memoized per endpoint switch).
+    """
+    version = _topology_version(db)
+    core_ids = _core_switch_ids(db)
+    path_version = _path_version(version, core_ids)
+    graph = None
+
+    paths = {}
+    for row in rows:
+        switch_id = row.Switch.id
+        if switch_id in paths:
+            continue
+        stored = row.SwitchPath
+        if stored is not None and stored.topology_version == path_version:
+            paths[switch_id] = (
+                stored.path_switch_ids, stored.path_port_ids, stored.path_edge_keys
+            )
+        else:
+            if graph is None:
+                graph = _get_link_graph(db, version)
+            paths[switch_id] = _path_entry(*graph.core_path(switch_id, core_ids))
+    return paths
+
+
+def _load_path_objects(db: Session, paths) -> Tuple[Dict[int, Switch], Dict[int, Port]]:
+    """Switches and outgoing ports of the given paths, one query per table."""
+    switch_ids = set()
+    port_ids = set()
+    for path_switches, path_port_ids, _ in paths:
+        if len(path_switches) > 1:
+            switch_ids.update(path_switches)
+            port_ids.update(path_port_ids)
+
+    switches_by_id = {}
+    ports_by_id = {}
+    if switch_ids:
+        switches_by_id = {
+            sw.id: sw for sw in db.query(Switch).filter(Switch.id.in_(switch_ids))
+        }
+    if port_ids:
+        ports_by_id = {
+            port.id: port for port in db.query(Port).filter(Port.id.in_(port_ids))
+        }
+    return switches_by_id, ports_by_id
+
+
+def _build_mac_path(row, path_entry, switches_by_id, ports_by_id) -> MacPathResponse:
+    endpoint_switch = row.Switch
+    path_switches, path_port_ids, path_edge_keys = path_entry
     path = []
-    path_node_ids = []
-    path_edge_keys = []
-
-    # Get all topology links to build adjacency
-    links = db.query(TopologyLink).all()
-
-    # Build adjacency map (bidirectional)
-    adjacency = {}  # switch_id -> [(neighbor_id, link)]
-    for link in links:
-        if link.local_switch_id not in adjacency:
-            adjacency[link.local_switch_id] = []
-        if link.remote_switch_id not in adjacency:
-            adjacency[link.remote_switch_id] = []
-
-        adjacency[link.local_switch_id].append((link.remote_switch_id, link))
-        adjacency[link.remote_switch_id].append((link.local_switch_id, link))
-
-    # BFS to find path from endpoint back to "core" (switch with most connections)
-    # Or find the longest path back (typically to core switches)
-    visited = set()
-    parent = {}  # child_id -> (parent_id, link)
-    queue = [endpoint_switch.id]
-    visited.add(endpoint_switch.id)
-
-    # Find all reachable switches
-    while queue:
-        current = queue.pop(0)
-        if current in adjacency:
-            for neighbor_id, link in adjacency[current]:
-                if neighbor_id not in visited:
-                    visited.add(neighbor_id)
-                    parent[neighbor_id] = (current, link)
-                    queue.append(neighbor_id)
-
-    # Find the "core" switch - the one with most connections or furthest from endpoint
-    # In a typical network, core switch has many connections
-    core_switch_id = endpoint_switch.id
-    if adjacency:
-        # Find switch with most connections that's reachable
-        max_connections = 0
-        for sw_id in visited:
-            conn_count = len(adjacency.get(sw_id, []))
-            if conn_count > max_connections:
-                max_connections = conn_count
-                core_switch_id = sw_id
 
     # Build path from core to endpoint
-    # Reconstruct path from core to endpoint
-    if core_switch_id != endpoint_switch.id:
-        # Do BFS from core to endpoint to get proper path
-        visited2 = set()
-        parent2 = {}
-        queue2 = [core_switch_id]
-        visited2.add(core_switch_id)
-
-        while queue2:
-            current = queue2.pop(0)
-            if current == endpoint_switch.id:
-                break
-            if current in adjacency:
-                for neighbor_id, link in adjacency[current]:
-                    if neighbor_id not in visited2:
-                        visited2.add(neighbor_id)
-                        parent2[neighbor_id] = (current, link)
-                        queue2.append(neighbor_id)
-
-        # Reconstruct path from core to endpoint
-        current = endpoint_switch.id
-        path_switches = []
-        path_links = []
-
-        while current in parent2:
-            path_switches.append(current)
-            prev_id, link = parent2[current]
-            path_links.append(link)
-            current = prev_id
-        path_switches.append(core_switch_id)
-
-        # Reverse to get core -> endpoint order
-        path_switches.reverse()
-        path_links.reverse()
-
-        # Build path response
+    if len(path_switches) > 1:
         for i, sw_id in enumerate(path_switches):
-            sw = db.query(Switch).filter(Switch.id == sw_id).first()
+            sw = switches_by_id.get(sw_id)
             if sw:
                 port_name = None
-                if i < len(path_links):
+                if i < len(path_port_ids):
                     # Get the outgoing port for this link
-                    link = path_links[i]
-                    port = db.query(Port).filter(Port.id == link.local_port_id).first()
+                    port = ports_by_id.get(path_port_ids[i])
                     if port:
                         port_name = port.port_name
 
@@ -167,32 +435,74 @@ def get_mac_path(mac_address: str, db: Session = Depends(get_db)):
                     port_name=port_name,
                     is_endpoint=(sw.id == endpoint_switch.id)
                 ))
-                path_node_ids.append(sw.id)
-
-        # Build edge keys (format: "from-to" for vis.js)
-        for link in path_links:
-            # Edge key can be either direction
-            path_edge_keys.append(f"{link.local_switch_id}-{link.remote_switch_id}")
-            path_edge_keys.append(f"{link.remote_switch_id}-{link.local_switch_id}")
     else:
         # Only one switch in path (endpoint is core or isolated)
         path.append(MacPathNode(
             switch_id=endpoint_switch.id,
             hostname=endpoint_switch.hostname,
             ip_address=endpoint_switch.ip_address,
-            port_name=endpoint_port.port_name,
+            port_name=row.port_name,
             is_endpoint=True
         ))
-        path_node_ids.append(endpoint_switch.id)
 
     return MacPathResponse(
-        mac_address=mac.mac_address,
-        ip_address=location.ip_address,
-        vendor_name=mac.vendor_name,
+        mac_address=row.mac_address,
+        ip_address=row.ip_address,
+        vendor_name=row.vendor_name,
         endpoint_switch_id=endpoint_switch.id,
         endpoint_switch_hostname=endpoint_switch.hostname,
-        endpoint_port=endpoint_port.port_name,
+        endpoint_port=row.port_name,
         path=path,
-        path_node_ids=path_node_ids,
         path_edge_keys=path_edge_keys
     )
+
+
+@router.get("/{mac_address}", response_model=MacPathResponse)
+def get_mac_path(mac_address: str, db: Session = Depends(get_db)):
+    """
+    Get the network path from core to endpoint for a MAC address.
+    Returns the path of switches from core -> distribution -> access.
+    """
+    # Normalize MAC address format (support both : and - separators)
+    mac_normalized = mac_address.upper().replace('-', ':')
+
+    row = _mac_path_query(db).filter(MacAddress.mac_address == mac_normalized).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="MAC address non trovato")
+    if row.location_id is None:
+        raise HTTPException(status_code=404, detail="MAC non ha una posizione corrente")
+    if not row.Switch or row.port_name is None:
+        raise HTTPException(status_code=404, detail="Switch o porta non trovati")
+
+    path_entry = _endpoint_paths(db, [row])[row.Switch.id]
+    switches_by_id, ports_by_id = _load_path_objects(db, [path_entry])
+    return _build_mac_path(row, path_entry, switches_by_id, ports_by_id)
+
+
+@router.post("/batch", response_model=List[MacPathResponse])
+def get_mac_paths(request: MacPathBatchRequest, db: Session = Depends(get_db)):
+    """
+    Get the core -> endpoint paths of several MAC addresses at once.
+
+    Results follow the request order; MACs that are unknown or have no
+    current location are left out. Each endpoint switch is traced once.
+    """
+    macs_normalized = list(dict.fromkeys(
+        mac.upper().replace('-', ':') for mac in request.mac_addresses
+    ))
+    if not macs_normalized:
+        return []
+
+    rows_by_mac = {}
+    for row in _mac_path_query(db).filter(MacAddress.mac_address.in_(macs_normalized)):
+        if row.Switch is None or row.port_name is None:
+            continue
+        rows_by_mac.setdefault(row.mac_address, row)
+    rows = [rows_by_mac[mac] for mac in macs_normalized if mac in rows_by_mac]
+
+    paths = _endpoint_paths(db, rows)
+    switches_by_id, ports_by_id = _load_path_objects(db, paths.values())
+    return [
+        _build_mac_path(row, paths[row.Switch.id], switches_by_id, ports_by_id)
+        for row in rows
+    ]
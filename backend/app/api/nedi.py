@@ -7,7 +7,9 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from app.db.database import get_db
+from app.api.dashboard import refresh_mac_rollups
+from app.api.mac_path import refresh_switch_paths
+from app.db.database import SessionLocal, get_db
 from app.services.nedi import NeDiService, get_nedi_scheduler
 
 logger = logging.getLogger(__name__)
@@ -15,6 +17,17 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/nedi", tags=["nedi"])
 
 
+def refresh_after_nedi_sync(result: Dict[str, Any]):
+    """Post-ingest hook for scheduled NeDi syncs, on a session of its own."""
+    db = SessionLocal()
+    try:
+        if result.get("success"):
+            refresh_switch_paths(db)
+        refresh_mac_rollups(db)
+    finally:
+        db.close()
+
+
 class NeDiConnectionStatus(BaseModel):
     """NeDi connection status response."""
     connected: bool
@@ -157,6 +170,10 @@ async def import_from_nedi(
     try:
         with NeDiService() as nedi:
             results = nedi.full_import(db, node_limit=request.node_limit)
+            if results.get("success"):
+                refresh_switch_paths(db)
+            # Nodes may be partially imported even when the import fails
+            refresh_mac_rollups(db)
 
             return NeDiImportResponse(
                 success=results.get("success", False),
@@ -191,6 +208,7 @@ async def import_nodes_only(
     try:
         with NeDiService() as nedi:
             stats = nedi.import_nodes_to_mactraker(db, limit=limit)
+            refresh_mac_rollups(db)
             return {"success": True, "stats": stats}
     except Exception as e:
         logger.error(f"Node import failed: {e}")
@@ -203,6 +221,7 @@ async def import_links_only(db: Session = Depends(get_db)):
     try:
         with NeDiService() as nedi:
             stats = nedi.import_links_to_mactraker(db)
+            refresh_switch_paths(db)
             return {"success": True, "stats": stats}
     except Exception as e:
         logger.error(f"Link import failed: {e}")
@@ -1,6 +1,6 @@
 """Pydantic schemas for API request/response."""
 from datetime import datetime
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Literal
 from pydantic import BaseModel, Field, field_validator
 
 
@@ -22,8 +22,10 @@ class SwitchBase(BaseModel):
     model: Optional[str] = None
     serial_number: Optional[str] = None
     use_ssh_fallback: bool = Field(default=False)
+    # Network tier used to pick the core of MAC paths
+    tier: Optional[Literal["core", "distribution", "access"]] = None
 
-    @field_validator('snmp_community', 'location', 'model', 'serial_number', mode='before')
+    @field_validator('snmp_community', 'location', 'model', 'serial_number', 'tier', mode='before')
     @classmethod
     def empty_str_to_none(cls, v):
         return empty_to_none(v)
@@ -44,6 +46,7 @@ class SwitchUpdate(BaseModel):
     serial_number: Optional[str] = None
     is_active: Optional[bool] = None
     use_ssh_fallback: Optional[bool] = None
+    tier: Optional[Literal["core", "distribution", "access"]] = None
 
 
 class SwitchGroupBasic(BaseModel):
@@ -141,10 +144,16 @@ class AlertResponse(BaseModel):
         from_attributes = True
 
 
+class AlertCursor(BaseModel):
+    after_created_at: datetime
+    after_id: int
+
+
 class AlertListResponse(BaseModel):
     items: List[AlertResponse]
     total: int
     unread_count: int
+    next_cursor: Optional[AlertCursor] = None
 
 
 # Port Schemas
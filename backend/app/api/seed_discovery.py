@@ -3,6 +3,7 @@ from typing import Optional, List
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
@@ -110,6 +111,8 @@ async def seed_discovery(
     # Process switches level by level (BFS)
     while to_process and current_depth < request.max_depth:
         next_level = []
+        # Neighbors first seen at this level, resolved against the DB in one batch
+        pending = []
 
         for switch in to_process:
             try:
@@ -126,48 +129,11 @@ async def seed_discovery(
                         "added": False
                     }
 
-                    # Try to identify the neighbor
-                    neighbor_switch = None
                     neighbor_ip = neighbor.remote_mgmt_address
 
                     if neighbor_ip and neighbor_ip not in discovered_ips:
                         discovered_ips.add(neighbor_ip)
-
-                        # Check if switch already exists by IP
-                        neighbor_switch = db.query(Switch).filter(
-                            Switch.ip_address == neighbor_ip
-                        ).first()
-
-                        if not neighbor_switch and neighbor.remote_system_name:
-                            # Check by hostname
-                            neighbor_switch = db.query(Switch).filter(
-                                Switch.hostname == neighbor.remote_system_name
-                            ).first()
-
-                        if neighbor_switch:
-                            result.switches_already_exist += 1
-                            neighbor_info["added"] = False
-                            neighbor_info["exists"] = True
-                            next_level.append(neighbor_switch)
-                        else:
-                            # Create new switch from discovered neighbor
-                            new_hostname = neighbor.remote_system_name or f"DISCOVERED-{neighbor_ip.replace('.', '-')}"
-
-                            new_switch = Switch(
-                                hostname=new_hostname,
-                                ip_address=neighbor_ip,
-                                device_type=request.device_type,
-                                snmp_community=request.snmp_community,
-                                group_id=request.group_id,
-                                is_active=True
-                            )
-                            db.add(new_switch)
-                            db.flush()
-
-                            result.switches_added += 1
-                            neighbor_info["added"] = True
-                            neighbor_info["new_switch_id"] = new_switch.id
-                            next_level.append(new_switch)
+                        pending.append((neighbor, neighbor_info))
 
                     result.discovered_switches.append(neighbor_info)
 
@@ -175,6 +141,59 @@ async def seed_discovery(
                 error_msg = f"Errore durante discovery di {switch.hostname}: {str(e)}"
                 result.errors.append(error_msg)
 
+        if pending:
+            # Check which neighbors already exist, by IP or hostname, in one query
+            level_ips = [neighbor.remote_mgmt_address for neighbor, _ in pending]
+            level_names = [
+                neighbor.remote_system_name for neighbor, _ in pending
+                if neighbor.remote_system_name
+            ]
+            existing = db.query(Switch).filter(
+                or_(Switch.ip_address.in_(level_ips), Switch.hostname.in_(level_names))
+            ).all()
+            by_ip = {s.ip_address: s for s in existing}
+            by_hostname = {s.hostname: s for s in existing}
+
+            new_switches = []
+            for neighbor, neighbor_info in pending:
+                neighbor_ip = neighbor.remote_mgmt_address
+
+                neighbor_switch = by_ip.get(neighbor_ip)
+                if not neighbor_switch and neighbor.remote_system_name:
+                    neighbor_switch = by_hostname.get(neighbor.remote_system_name)
+
+                if neighbor_switch:
+                    result.switches_already_exist += 1
+                    neighbor_info["added"] = False
+                    neighbor_info["exists"] = True
+                    next_level.append(neighbor_switch)
+                else:
+                    # Create new switch from discovered neighbor
+                    new_hostname = neighbor.remote_system_name or f"DISCOVERED-{neighbor_ip.replace('.', '-')}"
+
+                    new_switch = Switch(
+                        hostname=new_hostname,
+                        ip_address=neighbor_ip,
+                        device_type=request.device_type,
+                        snmp_community=request.snmp_community,
+                        group_id=request.group_id,
+                        is_active=True
+                    )
+                    if neighbor.remote_system_name:
+                        by_hostname[new_hostname] = new_switch
+                    new_switches.append((new_switch, neighbor_info))
+
+                    result.switches_added += 1
+                    neighbor_info["added"] = True
+                    next_level.append(new_switch)
+
+            if new_switches:
+                # One flush for the whole level; the INSERTs are batched
+                db.add_all([new_switch for new_switch, _ in new_switches])
+                db.flush()
+                for new_switch, neighbor_info in new_switches:
+                    neighbor_info["new_switch_id"] = new_switch.id
+
         to_process = next_level
         current_depth += 1
 
@@ -5,7 +5,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, select, delete, or_
 
 from app.db.database import get_db
-from app.db.models import Switch, SwitchGroup, MacLocation, Port, Alert, MacHistory, TopologyLink, DiscoveryLog
+from app.db.models import Switch, SwitchGroup, MacLocation, Port, Alert, MacHistory, TopologyLink, DiscoveryLog, SwitchMacSummary
 from app.api.schemas import (
     SwitchCreate,
     SwitchUpdate,
@@ -84,6 +84,7 @@ def get_switch_with_mac_count(db: Session, switch: Switch) -> dict:
         "vlan_count": vlan_count,
         # Site code from hostname prefix
         "site_code": site_code,
+        "tier": switch.tier,
     }
 
     if switch.group:
@@ -306,6 +307,7 @@ def bulk_delete_switches_post(
             )
         ))
         db.execute(delete(DiscoveryLog).where(DiscoveryLog.switch_id.in_(switch_ids)))
+        db.execute(delete(SwitchMacSummary).where(SwitchMacSummary.switch_id.in_(switch_ids)))
         db.execute(delete(Port).where(Port.switch_id.in_(switch_ids)))
         result = db.execute(delete(Switch).where(Switch.id.in_(switch_ids)))
         deleted_count = result.rowcount
@@ -336,6 +338,7 @@ def delete_all_switches_post(
         db.execute(delete(MacLocation))
         db.execute(delete(TopologyLink))
         db.execute(delete(DiscoveryLog))
+        db.execute(delete(SwitchMacSummary))
         db.execute(delete(Port))
         result = db.execute(delete(Switch))
         deleted_count = result.rowcount
@@ -379,6 +382,7 @@ def delete_switches_bulk(
 
         # 5. Discovery Logs
         db.execute(delete(DiscoveryLog).where(DiscoveryLog.switch_id.in_(switch_ids)))
+        db.execute(delete(SwitchMacSummary).where(SwitchMacSummary.switch_id.in_(switch_ids)))
 
         # 6. Ports
         db.execute(delete(Port).where(Port.switch_id.in_(switch_ids)))
@@ -422,6 +426,7 @@ def delete_all_switches(
 
         # 5. Discovery Logs
         db.execute(delete(DiscoveryLog))
+        db.execute(delete(SwitchMacSummary))
 
         # 6. Ports
         db.execute(delete(Port))
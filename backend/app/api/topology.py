@@ -7,6 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
+from app.api.mac_path import refresh_switch_paths
 from app.db.database import get_db
 from app.db.models import Switch, TopologyLink, Port, MacLocation
 from app.services.mac_endpoint_tracer import MacEndpointTracer
@@ -249,6 +250,10 @@ async def refresh_topology(db: Session = Depends(get_db)):
     lldp_service = LLDPDiscoveryService(db)
     result = await lldp_service.refresh_topology()
 
+    # Materialize the core -> switch paths for the new topology
+    if result.get("status") != "warning":
+        refresh_switch_paths(db)
+
     return result
 
 
@@ -10,6 +10,11 @@ class Settings(BaseSettings):
 
     # Database (SQLite for development, PostgreSQL for production)
     database_url: str = "sqlite:///./mactraker.db"
+    db_pool_size: int = 20
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30  # Seconds to wait for a free connection
+    db_pool_recycle: int = 3600  # Seconds before a server connection is recycled
+    db_query_cache_size: int = 1200  # SQLAlchemy compiled-statement cache entries
 
     # SNMP
     snmp_community: str = "public"
@@ -19,6 +24,10 @@ class Settings(BaseSettings):
     # Discovery
     discovery_interval_minutes: int = 15
     discovery_batch_size: int = 50
+    discovery_concurrency: int = 16  # Switches polled at the same time
+
+    # Intent verification
+    intent_check_concurrency: int = 4  # Checks run at the same time, one session each
 
     # Data Retention
     history_retention_days: int = 90
@@ -14,6 +14,10 @@ if settings.database_url.startswith("sqlite"):
             "check_same_thread": False,
             "timeout": 30,  # Wait up to 30 seconds for locked database
         },
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        query_cache_size=settings.db_query_cache_size,
     )
     # Enable foreign keys and WAL mode for SQLite (better concurrent access)
     @event.listens_for(engine, "connect")
@@ -23,13 +27,18 @@ if settings.database_url.startswith("sqlite"):
         cursor.execute("PRAGMA journal_mode=WAL")  # Write-Ahead Logging for concurrency
         cursor.execute("PRAGMA busy_timeout=30000")  # 30 second timeout
         cursor.execute("PRAGMA synchronous=NORMAL")  # Better performance with WAL
+        cursor.execute("PRAGMA temp_store=MEMORY")  # Sort/temp tables in RAM
+        cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB memory-mapped reads
         cursor.close()
 else:
     engine = create_engine(
         settings.database_url,
         pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        query_cache_size=settings.db_query_cache_size,
     )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -1,20 +1,25 @@
 """Database models for Mac-Traker."""
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 from sqlalchemy import (
     Boolean,
+    Date,
     DateTime,
     Enum,
     ForeignKey,
     Index,
     Integer,
+    JSON,
+    SmallInteger,
     String,
     Text,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.database import Base
+from app.utils.mac_utils import classify_mac
 
 
 class SwitchGroup(Base):
@@ -67,6 +72,8 @@ class Switch(Base):
     vlan_count: Mapped[int] = mapped_column(Integer, default=0)  # Number of active VLANs
     # Site code extracted from hostname prefix (e.g., "01" from "01_L2_switch")
     site_code: Mapped[Optional[str]] = mapped_column(String(10), index=True)
+    # Network tier: core, distribution, access (None = not classified)
+    tier: Mapped[Optional[str]] = mapped_column(String(20))
 
     # Relationships
     group: Mapped[Optional["SwitchGroup"]] = relationship(
@@ -82,7 +89,20 @@ class Switch(Base):
         "DiscoveryLog", back_populates="switch"
     )
 
-    __table_args__ = (Index("ix_switches_ip", "ip_address"),)
+    __table_args__ = (
+        Index("ix_switches_ip", "ip_address"),
+        # Partial index for the is_active COUNTs and filters
+        Index(
+            "ix_switches_active", "id",
+            sqlite_where=text("is_active = 1"),
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_switches_core", "id",
+            sqlite_where=text("tier = 'core'"),
+            postgresql_where=text("tier = 'core'"),
+        ),
+    )
 
 
 class Port(Base):
@@ -141,6 +161,13 @@ class MacAddress(Base):
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # 0=real, 1=random (locally administered), 2=multicast - see app.utils.mac_utils
+    mac_class: Mapped[int] = mapped_column(
+        SmallInteger,
+        default=lambda ctx: classify_mac(ctx.get_current_parameters()["mac_address"]),
+        nullable=False,
+        server_default="0",
+    )
 
     # Relationships
     locations: Mapped[list["MacLocation"]] = relationship(
@@ -151,7 +178,20 @@ class MacAddress(Base):
     )
     alerts: Mapped[list["Alert"]] = relationship("Alert", back_populates="mac")
 
-    __table_args__ = (Index("ix_mac_addresses_mac", "mac_address"),)
+    __table_args__ = (
+        Index("ix_mac_addresses_mac", "mac_address"),
+        # Partial index for the is_active COUNTs and filters
+        Index(
+            "ix_mac_addresses_active", "id",
+            sqlite_where=text("is_active = 1"),
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_mac_addresses_active_class", "mac_class",
+            sqlite_where=text("is_active = 1"),
+            postgresql_where=text("is_active"),
+        ),
+    )
 
 
 class MacLocation(Base):
@@ -181,9 +221,58 @@ class MacLocation(Base):
     port: Mapped["Port"] = relationship("Port", back_populates="mac_locations")
 
     __table_args__ = (
-        Index("ix_mac_locations_mac_current", "mac_id", "is_current"),
+        # Covers the MAC -> current location lookups (e.g. MAC path): the
+        # location columns are read from the index without a table fetch
+        Index(
+            "ix_mac_locations_mac_current_cover",
+            "mac_id", "is_current", "switch_id", "port_id", "ip_address",
+        ),
         Index("ix_mac_locations_switch_port", "switch_id", "port_id"),
+        # Only current locations are joined/counted per switch
+        Index(
+            "ix_mac_locations_current_switch", "switch_id",
+            sqlite_where=text("is_current = 1"),
+            postgresql_where=text("is_current"),
+        ),
+        # Endpoint lookup by IP; mac_id included so the join needs no row fetch
+        Index(
+            "ix_mac_locations_current_ip", "ip_address", "mac_id",
+            sqlite_where=text("is_current = 1"),
+            postgresql_where=text("is_current"),
+        ),
+    )
+
+
+class SwitchMacSummary(Base):
+    """Per-switch count of current MAC locations, refreshed after each discovery."""
+
+    __tablename__ = "switch_mac_summary"
+
+    switch_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("switches.id", ondelete="CASCADE"), primary_key=True
+    )
+    mac_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_switch_mac_summary_count", "mac_count"),)
+
+
+class SwitchPath(Base):
+    """Core -> switch path per endpoint switch, refreshed after topology discovery."""
+
+    __tablename__ = "switch_paths"
+
+    endpoint_switch_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("switches.id", ondelete="CASCADE"), primary_key=True
     )
+    # Topology version and core switches the path was computed from; rows with
+    # a different version are stale and ignored
+    topology_version: Mapped[str] = mapped_column(String(255), nullable=False)
+    path_switch_ids: Mapped[list] = mapped_column(JSON, nullable=False)
+    # Outgoing local port of each hop, one per link
+    path_port_ids: Mapped[list] = mapped_column(JSON, nullable=False)
+    path_edge_keys: Mapped[list] = mapped_column(JSON, nullable=False)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
 class MacHistory(Base):
@@ -215,6 +304,16 @@ class MacHistory(Base):
     )
 
 
+class MacHistoryDaily(Base):
+    """Daily count of MAC history events per type, refreshed after each discovery."""
+
+    __tablename__ = "mac_history_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    event_type: Mapped[str] = mapped_column(String(20), primary_key=True)
+    event_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
 class TopologyLink(Base):
     """Network topology link between switches."""
 
@@ -276,7 +375,8 @@ class Alert(Base):
 
     __table_args__ = (
         Index("ix_alerts_unread", "is_read", "created_at"),
-        Index("ix_alerts_type", "alert_type"),
+        Index("ix_alerts_type_created", "alert_type", "created_at"),
+        Index("ix_alerts_created_id", "created_at", "id"),
     )
 
 
@@ -318,7 +418,10 @@ class DiscoveryLog(Base):
         "Switch", back_populates="discovery_logs"
     )
 
-    __table_args__ = (Index("ix_discovery_logs_started", "started_at"),)
+    __table_args__ = (
+        Index("ix_discovery_logs_started", "started_at"),
+        Index("ix_discovery_logs_status_completed", "status", "completed_at"),
+    )
 
 
 class Setting(Base):
@@ -345,7 +448,7 @@ class AlertRule(Base):
     description: Mapped[Optional[str]] = mapped_column(Text)
     rule_type: Mapped[str] = mapped_column(String(50), nullable=False)
     # Rule types: oui_filter, switch_filter, port_filter, vlan_filter, vendor_filter
-    conditions: Mapped[str] = mapped_column(Text, nullable=False)  # JSON conditions
+    conditions: Mapped[dict] = mapped_column(JSON, nullable=False)  # JSON conditions
     alert_severity: Mapped[str] = mapped_column(String(20), default="warning")
     is_enabled: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -367,7 +470,9 @@ class Webhook(Base):
     webhook_type: Mapped[str] = mapped_column(String(50), default="generic")
     # Types: generic, slack, teams, discord, siem
     secret_token: Mapped[Optional[str]] = mapped_column(String(500))  # For signature verification
-    alert_types: Mapped[str] = mapped_column(Text, default="all")  # JSON array or "all"
+    alert_types: Mapped[list] = mapped_column(
+        JSON, default=lambda: ["all"]
+    )  # List of alert types, ["all"] for every type
     is_enabled: Mapped[bool] = mapped_column(Boolean, default=True)
     last_triggered: Mapped[Optional[datetime]] = mapped_column(DateTime)
     last_status: Mapped[Optional[str]] = mapped_column(String(50))  # success, error
@@ -427,13 +532,49 @@ class Host(Base):
     # User-added notes
     notes: Mapped[Optional[str]] = mapped_column(Text)
 
+    # Relationships (edge location lookups; no back-reference needed)
+    edge_switch: Mapped[Optional["Switch"]] = relationship("Switch")
+    edge_port: Mapped[Optional["Port"]] = relationship("Port")
+
     __table_args__ = (
         Index("ix_hosts_mac", "mac_address"),
         Index("ix_hosts_ip", "ip_address"),
         Index("ix_hosts_edge", "edge_switch_id", "edge_port_id"),
         Index("ix_hosts_site", "site_code"),
         Index("ix_hosts_active", "is_active", "last_seen"),
-    )
+        # Unfiltered host list pages ORDER BY last_seen DESC
+        Index("ix_hosts_last_seen", "last_seen"),
+        Index(
+            "ix_hosts_device_type", "device_type", "last_seen",
+            sqlite_where=text("device_type IS NOT NULL"),
+            postgresql_where=text("device_type IS NOT NULL"),
+        ),
+        # Partial indexes for the (rare) critical / infrastructure filters
+        Index(
+            "ix_hosts_critical", "last_seen",
+            sqlite_where=text("is_critical = 1"),
+            postgresql_where=text("is_critical"),
+        ),
+        Index(
+            "ix_hosts_infrastructure", "last_seen",
+            sqlite_where=text("is_infrastructure = 1"),
+            postgresql_where=text("is_infrastructure"),
+        ),
+    )
+
+
+class HostStatsRollup(Base):
+    """Host counters per dimension, recomputed after every write to hosts.
+
+    dimension "counter" holds the scalar totals (value = counter name); the
+    other dimensions hold one row per distinct column value ("" for NULL).
+    """
+
+    __tablename__ = "host_stats_rollup"
+
+    dimension: Mapped[str] = mapped_column(String(20), primary_key=True)
+    value: Mapped[str] = mapped_column(String(255), primary_key=True)
+    host_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
 
 
 class NetworkSnapshot(Base):
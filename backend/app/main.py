@@ -14,6 +14,7 @@ from sqlalchemy import text
 from app.core.config import get_settings
 from app.db.database import engine, Base
 from app.db import models  # Import models to register them
+from app.utils.mac_utils import MAC_CLASS_SQL_CASE
 from app.services.backup.backup_scheduler import get_backup_scheduler
 from app.services.discovery.discovery_scheduler import get_discovery_scheduler
 from app.services.cleanup.cleanup_scheduler import get_cleanup_scheduler
@@ -53,6 +54,39 @@ def migrate_database():
                     conn.commit()
                     print(f"Column {col_name} added successfully!")
 
+            # Migration: switches.tier (core/distribution/access, set by operators)
+            if 'tier' not in columns:
+                print("Adding tier column to switches table...")
+                conn.execute(text("ALTER TABLE switches ADD COLUMN tier VARCHAR(20)"))
+                conn.commit()
+                print("Column tier added successfully!")
+
+            # Migration: mac_addresses.mac_class, backfilled from the first octet
+            # (bit 0 = multicast, bit 1 = locally administered; see app.utils.mac_utils)
+            result = conn.execute(text("PRAGMA table_info(mac_addresses)"))
+            if 'mac_class' not in [row[1] for row in result.fetchall()]:
+                print("Adding mac_class column to mac_addresses table...")
+                conn.execute(text("ALTER TABLE mac_addresses ADD COLUMN mac_class SMALLINT NOT NULL DEFAULT 0"))
+                conn.execute(text(f"UPDATE mac_addresses SET mac_class = {MAC_CLASS_SQL_CASE}"))
+                conn.commit()
+                print("Column mac_class added successfully!")
+
+            # Migration: alert_rules.conditions / webhooks.alert_types are JSON columns.
+            # Legacy rows stored the bare string "all" which is not valid JSON.
+            result = conn.execute(text("UPDATE webhooks SET alert_types = '[\"all\"]' WHERE alert_types = 'all' OR alert_types IS NULL"))
+            if result.rowcount:
+                conn.commit()
+                print(f"Converted {result.rowcount} webhook alert_types to JSON")
+
+            # Migration: indexes declared on existing tables. create_all() only
+            # creates indexes together with a new table, so add missing ones here.
+            conn.execute(text("DROP INDEX IF EXISTS ix_alerts_type"))  # superseded by ix_alerts_type_created
+            conn.execute(text("DROP INDEX IF EXISTS ix_mac_locations_mac_current"))  # superseded by ix_mac_locations_mac_current_cover
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(bind=conn, checkfirst=True)
+            conn.commit()
+
             print("Database migration complete.")
 
 
@@ -68,6 +102,11 @@ async def lifespan(app: FastAPI):
     # Run migrations for missing columns
     migrate_database()
 
+    # Warm the offline path graph in the background (graph endpoints answer
+    # 503 until it is ready)
+    from app.services.network_graph import get_network_graph
+    get_network_graph().request_rebuild()
+
     # Start backup scheduler
     backup_scheduler = get_backup_scheduler()
     backup_scheduler.start()
@@ -95,7 +134,9 @@ async def lifespan(app: FastAPI):
     print("Intent verification scheduler started (disabled by default, configure via /api/intent/scheduler/configure).")
 
     # Start NeDi sync scheduler (enabled by default - replaces slow SNMP discovery)
+    from app.api.nedi import refresh_after_nedi_sync
     nedi_scheduler = get_nedi_scheduler()
+    nedi_scheduler.set_on_complete(refresh_after_nedi_sync)
     nedi_scheduler.start(interval_minutes=15, enabled=True)
     print("NeDi sync scheduler started (every 15 minutes, configure via /api/nedi/scheduler/configure).")
 
@@ -103,6 +144,9 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     print("Mac-Traker shutting down...")
+    from app.api.alert_rules import close_webhook_client
+    await close_webhook_client()
+    print("Webhook HTTP client closed.")
     nedi_scheduler.stop()
     print("NeDi sync scheduler stopped.")
     intent_scheduler.stop()
@@ -141,7 +141,6 @@ class HistoryCleanupService:
             ).scalar() or 0
 
             # Records by event type
-            from sqlalchemy import distinct
             event_types = db.query(
                 MacHistory.event_type,
                 func.count(MacHistory.id)
@@ -3,6 +3,7 @@
 Uses APScheduler to run periodic discovery tasks.
 """
 import logging
+import threading
 from datetime import datetime
 from typing import Optional, Dict, Any
 
@@ -25,6 +26,8 @@ class DiscoveryScheduler:
         }
         self._last_discovery_result: Optional[Dict[str, Any]] = None
         self._discovery_function = None  # Will be set when we start
+        # Held while a discovery runs; automatic and manual runs never overlap
+        self._run_lock = threading.Lock()
 
     def start(self, discovery_function=None):
         """Start the scheduler if not already running.
@@ -90,12 +93,29 @@ class DiscoveryScheduler:
             replace_existing=True
         )
 
-    def _run_discovery(self):
-        """Execute the discovery and store the result."""
+    def _run_discovery(self, trigger: str = "scheduled", **kwargs):
+        """Execute the discovery and store the result.
+
+        Skipped if another discovery (automatic or manual) is still running.
+
+        Args:
+            trigger: "scheduled" or "manual", for logging and the stored result
+            **kwargs: Passed through to the discovery function
+        """
+        if not self._run_lock.acquire(blocking=False):
+            logger.warning(f"Discovery already running, skipping {trigger} discovery")
+            return
+        try:
+            self._run_discovery_locked(trigger, **kwargs)
+        finally:
+            self._run_lock.release()
+
+    def _run_discovery_locked(self, trigger: str, **kwargs):
         import asyncio
         from app.db.database import SessionLocal
 
-        logger.info("Running scheduled discovery...")
+        label = trigger.capitalize()
+        logger.info(f"Running {trigger} discovery...")
 
         try:
             if self._discovery_function:
@@ -103,13 +123,13 @@ class DiscoveryScheduler:
                 db = SessionLocal()
                 try:
                     # Run the async discovery function
-                    asyncio.run(self._discovery_function(db))
+                    asyncio.run(self._discovery_function(db, **kwargs))
                     self._last_discovery_result = {
                         "success": True,
                         "timestamp": datetime.utcnow().isoformat(),
-                        "message": "Scheduled discovery completed"
+                        "message": f"{label} discovery completed"
                     }
-                    logger.info("Scheduled discovery completed successfully")
+                    logger.info(f"{label} discovery completed successfully")
                 finally:
                     db.close()
             else:
@@ -125,7 +145,7 @@ class DiscoveryScheduler:
                 "timestamp": datetime.utcnow().isoformat(),
                 "message": f"Error: {str(e)}"
             }
-            logger.error(f"Scheduled discovery failed: {e}")
+            logger.error(f"{label} discovery failed: {e}")
 
     def get_status(self) -> Dict[str, Any]:
         """Get current scheduler status.
@@ -159,7 +179,33 @@ class DiscoveryScheduler:
     def trigger_now(self):
         """Trigger a discovery immediately (for manual start)."""
         if self._discovery_function:
-            self._run_discovery()
+            self._run_discovery(trigger="manual")
+
+    def enqueue_now(self, **kwargs) -> bool:
+        """Queue a one-off discovery on the scheduler's worker pool.
+
+        The run happens outside the web server's request threads and shares
+        _run_discovery with the automatic job, so its outcome shows up in
+        last_discovery_result.
+
+        Args:
+            **kwargs: Passed through to the discovery function (e.g. switch_ids)
+
+        Returns:
+            False if the scheduler is not running (the job was not queued)
+        """
+        if not (self._is_running and self._discovery_function):
+            return False
+
+        self.scheduler.add_job(
+            self._run_discovery,
+            id="manual_discovery",
+            name="Manual Network Discovery",
+            kwargs={**kwargs, "trigger": "manual"},
+            replace_existing=True,
+        )
+        logger.info("Manual discovery queued")
+        return True
 
 
 # Singleton instance
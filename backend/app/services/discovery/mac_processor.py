@@ -1,11 +1,20 @@
 """MAC Address Processor for vendor lookup and classification."""
 import logging
 import httpx
+from datetime import datetime, time
 from typing import Optional, Dict, Tuple
 
+from sqlalchemy import delete, func, insert, literal, select
 from sqlalchemy.orm import Session
 
-from app.db.models import MacAddress, OuiVendor
+from app.db.models import (
+    MacAddress,
+    MacHistory,
+    MacHistoryDaily,
+    MacLocation,
+    OuiVendor,
+    SwitchMacSummary,
+)
 from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -464,3 +473,60 @@ class MacProcessor:
 
         self.db.commit()
         return stats
+
+    def refresh_switch_summary(self) -> int:
+        """
+        Rebuild the per-switch MAC count summary from current locations.
+
+        Returns:
+            Number of switches with at least one current MAC
+        """
+        counts = (
+            select(
+                MacLocation.switch_id,
+                func.count(MacLocation.id),
+                literal(datetime.utcnow()),
+            )
+            .where(MacLocation.is_current == True)
+            .group_by(MacLocation.switch_id)
+        )
+
+        self.db.execute(delete(SwitchMacSummary))
+        result = self.db.execute(
+            insert(SwitchMacSummary).from_select(
+                ["switch_id", "mac_count", "refreshed_at"], counts
+            )
+        )
+        self.db.commit()
+        return result.rowcount
+
+    def refresh_history_rollup(self) -> int:
+        """
+        Recount daily MAC history events from the last rolled-up day onwards.
+
+        Days before the latest one already in mac_history_daily are final and
+        left untouched; an empty rollup is rebuilt from the full history.
+
+        Returns:
+            Number of (day, event_type) rows written
+        """
+        last_day = self.db.query(func.max(MacHistoryDaily.day)).scalar()
+
+        day_expr = func.date(MacHistory.event_at)
+        counts = select(
+            day_expr,
+            MacHistory.event_type,
+            func.count(MacHistory.id),
+        ).group_by(day_expr, MacHistory.event_type)
+
+        if last_day is not None:
+            counts = counts.where(MacHistory.event_at >= datetime.combine(last_day, time.min))
+            self.db.execute(delete(MacHistoryDaily).where(MacHistoryDaily.day >= last_day))
+
+        result = self.db.execute(
+            insert(MacHistoryDaily).from_select(
+                ["day", "event_type", "event_count"], counts
+            )
+        )
+        self.db.commit()
+        return result.rowcount
@@ -1,4 +1,6 @@
 """SNMP Discovery Service for MAC address table retrieval."""
+import asyncio
+import contextlib
 import logging
 import re
 from datetime import datetime
@@ -88,9 +90,15 @@ HUAWEI_MIB = {
 class SNMPDiscoveryService:
     """Service for discovering MAC addresses via SNMP."""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, db_lock: Optional[asyncio.Lock] = None):
         self.db = db
         self.alert_service = AlertService(db)
+        # Shared by concurrent discoveries on the same session: the SNMP walks
+        # overlap, the database writes for each switch run one at a time.
+        self.db_lock = db_lock
+
+    def _db_section(self):
+        return self.db_lock if self.db_lock is not None else contextlib.nullcontext()
 
     async def discover_switch(self, switch: Switch) -> Dict[str, Any]:
         """
@@ -112,6 +120,7 @@ class SNMPDiscoveryService:
             "started_at": start_time,
         }
 
+        mac_entries = None
         try:
             logger.info(f"Starting discovery for {switch.hostname} ({switch.ip_address})")
 
@@ -123,29 +132,37 @@ class SNMPDiscoveryService:
             logger.info(f"Using real SNMP query for {switch.hostname} with community '{switch.snmp_community}'")
             mac_entries = await self._query_snmp(switch)
 
-            # Process discovered MACs
-            processed_count = await self._process_mac_entries(switch, mac_entries)
-            result["mac_count"] = processed_count
-            logger.info(f"Processed {processed_count} MACs for {switch.hostname}")
-
-            # Query and update system info (sysName, serial, VLANs, port status)
-            await self.update_switch_system_info(switch)
-
-            # Update switch last_discovery timestamp
-            switch.last_discovery = datetime.utcnow()
-            switch.last_seen = datetime.utcnow()
-            self.db.commit()
-
         except Exception as e:
             logger.error(f"Discovery failed for {switch.hostname}: {str(e)}", exc_info=True)
             result["status"] = "error"
             result["error_message"] = str(e)
 
-        # Log the discovery
-        result["completed_at"] = datetime.utcnow()
-        result["duration_ms"] = int((result["completed_at"] - start_time).total_seconds() * 1000)
+        async with self._db_section():
+            if mac_entries is not None:
+                try:
+                    # Process discovered MACs
+                    processed_count = await self._process_mac_entries(switch, mac_entries)
+                    result["mac_count"] = processed_count
+                    logger.info(f"Processed {processed_count} MACs for {switch.hostname}")
+
+                    # Query and update system info (sysName, serial, VLANs, port status)
+                    await self.update_switch_system_info(switch)
+
+                    # Update switch last_discovery timestamp
+                    switch.last_discovery = datetime.utcnow()
+                    switch.last_seen = datetime.utcnow()
+                    self.db.commit()
+
+                except Exception as e:
+                    logger.error(f"Discovery failed for {switch.hostname}: {str(e)}", exc_info=True)
+                    result["status"] = "error"
+                    result["error_message"] = str(e)
+
+            # Log the discovery
+            result["completed_at"] = datetime.utcnow()
+            result["duration_ms"] = int((result["completed_at"] - start_time).total_seconds() * 1000)
 
-        self._log_discovery(switch, result)
+            self._log_discovery(switch, result)
 
         return result
 
@@ -1,4 +1,6 @@
 """SSH/CLI Discovery Service for MAC address table retrieval via SSH fallback."""
+import asyncio
+import contextlib
 import logging
 import re
 from datetime import datetime
@@ -19,9 +21,15 @@ class SSHDiscoveryService:
     # MAC address patterns
     MAC_PATTERN = re.compile(r'([0-9A-Fa-f]{4}[-][0-9A-Fa-f]{4}[-][0-9A-Fa-f]{4}|[0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2})')
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, db_lock: Optional[asyncio.Lock] = None):
         self.db = db
         self.alert_service = AlertService(db)
+        # Shared by concurrent discoveries on the same session so the database
+        # writes for each switch run one at a time.
+        self.db_lock = db_lock
+
+    def _db_section(self):
+        return self.db_lock if self.db_lock is not None else contextlib.nullcontext()
 
     async def discover_switch(self, switch: Switch) -> Dict[str, Any]:
         """
@@ -44,6 +52,7 @@ class SSHDiscoveryService:
             "discovery_type": "cli",
         }
 
+        mac_entries = None
         try:
             logger.info(f"Starting SSH discovery for {switch.hostname} ({switch.ip_address})")
 
@@ -51,26 +60,34 @@ class SSHDiscoveryService:
             logger.info(f"Using real SSH connection for {switch.hostname}")
             mac_entries = await self._query_ssh(switch)
 
-            # Process discovered MACs
-            processed_count = await self._process_mac_entries(switch, mac_entries)
-            result["mac_count"] = processed_count
-            logger.info(f"SSH discovery processed {processed_count} MACs for {switch.hostname}")
-
-            # Update switch last_discovery timestamp
-            switch.last_discovery = datetime.utcnow()
-            switch.last_seen = datetime.utcnow()
-            self.db.commit()
-
         except Exception as e:
             logger.error(f"SSH discovery failed for {switch.hostname}: {str(e)}", exc_info=True)
             result["status"] = "error"
             result["error_message"] = str(e)
 
-        # Log the discovery
-        result["completed_at"] = datetime.utcnow()
-        result["duration_ms"] = int((result["completed_at"] - start_time).total_seconds() * 1000)
+        async with self._db_section():
+            if mac_entries is not None:
+                try:
+                    # Process discovered MACs
+                    processed_count = await self._process_mac_entries(switch, mac_entries)
+                    result["mac_count"] = processed_count
+                    logger.info(f"SSH discovery processed {processed_count} MACs for {switch.hostname}")
+
+                    # Update switch last_discovery timestamp
+                    switch.last_discovery = datetime.utcnow()
+                    switch.last_seen = datetime.utcnow()
+                    self.db.commit()
+
+                except Exception as e:
+                    logger.error(f"SSH discovery failed for {switch.hostname}: {str(e)}", exc_info=True)
+                    result["status"] = "error"
+                    result["error_message"] = str(e)
 
-        self._log_discovery(switch, result)
+            # Log the discovery
+            result["completed_at"] = datetime.utcnow()
+            result["duration_ms"] = int((result["completed_at"] - start_time).total_seconds() * 1000)
+
+            self._log_discovery(switch, result)
 
         return result
 
@@ -117,8 +134,6 @@ class SSHDiscoveryService:
         This is the real SSH implementation using netmiko.
         Requires network access to the switch.
         """
-        from netmiko import ConnectHandler
-
         credentials = self._get_ssh_credentials(switch)
         device_type = self._get_netmiko_device_type(switch)
 
@@ -135,26 +150,29 @@ class SSHDiscoveryService:
             'banner_timeout': 30,
         }
 
-        mac_entries = []
+        switch_type = (switch.device_type or "huawei").lower()
 
         try:
-            with ConnectHandler(**device) as connection:
-                # Get MAC address table based on device type
-                switch_type = (switch.device_type or "huawei").lower()
-
-                if switch_type == "huawei":
-                    mac_entries = self._parse_huawei_mac_table(connection)
-                elif switch_type == "cisco":
-                    mac_entries = self._parse_cisco_mac_table(connection)
-                else:
-                    # Generic approach
-                    mac_entries = self._parse_generic_mac_table(connection, switch_type)
-
+            # netmiko blocks: run the session in a worker thread so concurrent
+            # discoveries and other requests keep the event loop
+            return await asyncio.to_thread(self._read_mac_table, device, switch_type)
         except Exception as e:
             logger.error(f"SSH query failed for {switch.hostname}: {e}")
             raise
 
-        return mac_entries
+    def _read_mac_table(self, device: Dict[str, Any], switch_type: str) -> List[Dict[str, Any]]:
+        """Open the SSH session and read the MAC address table (blocking)."""
+        from netmiko import ConnectHandler
+
+        with ConnectHandler(**device) as connection:
+            # Get MAC address table based on device type
+            if switch_type == "huawei":
+                return self._parse_huawei_mac_table(connection)
+            elif switch_type == "cisco":
+                return self._parse_cisco_mac_table(connection)
+            else:
+                # Generic approach
+                return self._parse_generic_mac_table(connection, switch_type)
 
     def _parse_huawei_mac_table(self, connection) -> List[Dict[str, Any]]:
         """Parse MAC address table from Huawei CloudEngine switch."""
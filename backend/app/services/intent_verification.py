@@ -3,13 +3,19 @@
 This module provides automated checks to verify network intent and detect
 configuration issues, anomalies, and compliance violations.
 """
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+
+from cachetools import TTLCache
 from sqlalchemy import func, and_
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import SingletonThreadPool, StaticPool
 
+from app.core.config import get_settings
 from app.db.models import (
     Switch, Port, MacAddress, MacLocation, TopologyLink, Host
 )
@@ -45,6 +51,14 @@ class IntentCheckResult:
     remediation: Optional[str] = None  # Suggested fix/action
 
 
+# Seconds a full run is reused by /intent/run, /intent/summary and the scheduler
+LAST_RUN_TTL = 60
+
+# Last full run as (run_at, results); every run_all_checks() refreshes it
+_last_run_cache: TTLCache = TTLCache(maxsize=1, ttl=LAST_RUN_TTL)
+_last_run_lock = threading.Lock()
+
+
 class IntentVerificationService:
     """Service for running network intent verification checks."""
 
@@ -66,26 +80,62 @@ class IntentVerificationService:
         ]
 
     def run_all_checks(self) -> List[IntentCheckResult]:
-        """Run all intent verification checks."""
-        results = []
-        for check_func in self._checks:
-            try:
-                result = check_func()
-                results.append(result)
-            except Exception as e:
-                # Create error result for failed check
-                results.append(IntentCheckResult(
-                    check_id=check_func.__name__,
-                    check_name=check_func.__name__.replace('_check_', '').replace('_', ' ').title(),
-                    category=CheckCategory.COMPLIANCE,
-                    severity=CheckSeverity.ERROR,
-                    passed=False,
-                    message=f"Check failed with error: {str(e)}",
-                    affected_items=[],
-                    checked_at=datetime.utcnow()
+        """Run all intent verification checks.
+
+        The checks are independent read-only queries, so they run in a thread
+        pool, each on its own session; results keep the order of self._checks.
+        """
+        run_at = datetime.utcnow()
+        workers = min(get_settings().intent_check_concurrency, len(self._checks))
+        engine = self.db.get_bind().engine
+
+        # A single shared connection (in-memory SQLite) can't serve concurrent sessions
+        if workers <= 1 or isinstance(engine.pool, (StaticPool, SingletonThreadPool)):
+            results = [self._run_guarded(check_func) for check_func in self._checks]
+        else:
+            def run_in_own_session(check_name: str) -> IntentCheckResult:
+                with Session(bind=engine) as db:
+                    service = IntentVerificationService(db)
+                    return service._run_guarded(getattr(service, check_name))
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    run_in_own_session, [f.__name__ for f in self._checks]
                 ))
+
+        with _last_run_lock:
+            _last_run_cache["last_run"] = (run_at, results)
         return results
 
+    def _run_guarded(self, check_func) -> IntentCheckResult:
+        """Run one check, turning an exception into a failed result."""
+        try:
+            return check_func()
+        except Exception as e:
+            # Create error result for failed check
+            return IntentCheckResult(
+                check_id=check_func.__name__,
+                check_name=check_func.__name__.replace('_check_', '').replace('_', ' ').title(),
+                category=CheckCategory.COMPLIANCE,
+                severity=CheckSeverity.ERROR,
+                passed=False,
+                message=f"Check failed with error: {str(e)}",
+                affected_items=[],
+                checked_at=datetime.utcnow()
+            )
+
+    def get_recent_results(self) -> Tuple[datetime, List[IntentCheckResult]]:
+        """Return the last full run if it is recent enough, else run all checks.
+
+        Returns (run_at, results).
+        """
+        with _last_run_lock:
+            last_run = _last_run_cache.get("last_run")
+        if last_run is not None:
+            return last_run
+        run_at = datetime.utcnow()
+        return run_at, self.run_all_checks()
+
     def run_check(self, check_id: str) -> Optional[IntentCheckResult]:
         """Run a specific check by ID."""
         for check_func in self._checks:
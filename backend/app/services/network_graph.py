@@ -3,26 +3,40 @@
 Pre-calculates and caches the network topology graph for fast MAC path tracing
 without requiring SSH connections.
 """
+import logging
 import threading
+from array import array
 from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional, Set, Tuple, Any
+from typing import Dict, List, Optional, Any
 
 from sqlalchemy.orm import Session
 
 from app.db.models import Switch, TopologyLink, Port, MacLocation, MacAddress
 
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for further changes before a scheduled rebuild runs
+REBUILD_DEBOUNCE_SECONDS = 2.0
+
 
 class NetworkGraph:
     """
     Pre-calculated network topology graph.
 
-    Provides O(V+E) path lookups using cached adjacency lists.
+    BFS parent trees rooted at the core switches are computed at build time,
+    so core <-> switch paths only walk O(hops) entries. Other pairs use a
+    bidirectional BFS over the CSR adjacency.
     Thread-safe singleton pattern for app-wide caching.
     """
 
     _instance: Optional["NetworkGraph"] = None
     _lock = threading.Lock()
+    # Serializes builds
+    _build_lock = threading.Lock()
+    _rebuild_lock = threading.Lock()
+    # Pending debounced rebuild (see schedule_rebuild)
+    _rebuild_timer: Optional[threading.Timer] = None
 
     def __init__(self):
         # Graph structure: switch_id -> {neighbor_id: link_data}
@@ -33,11 +47,24 @@ class NetworkGraph:
         self.ports: Dict[int, Dict] = {}
         # Core switches (highest connectivity)
         self.core_switch_ids: List[int] = []
+        # /core-switches payload entries, computed once per build
+        self.core_switch_info: List[Dict[str, Any]] = []
+        # Dense node indexing for the path trees: switch_id <-> index
+        self._node_ids: List[int] = []
+        self._node_index: Dict[int, int] = {}
+        # CSR adjacency over dense indexes: neighbors of node i are
+        # _indices[_indptr[i]:_indptr[i + 1]]
+        self._indptr: array = array("i", [0])
+        self._indices: array = array("i")
+        # BFS parent tree per source index (parent index, -1 = unreachable)
+        self._parent_trees: Dict[int, array] = {}
         # Graph metadata
         self.node_count: int = 0
         self.edge_count: int = 0
         self.built_at: Optional[datetime] = None
         self.is_valid: bool = False
+        # Bumped on every build/invalidate so callers can key derived caches
+        self.generation: int = 0
 
     @classmethod
     def get_instance(cls) -> "NetworkGraph":
@@ -54,82 +81,156 @@ class NetworkGraph:
         with cls._lock:
             if cls._instance:
                 cls._instance.is_valid = False
+                cls._instance.generation += 1
 
     def build(self, db: Session) -> Dict[str, Any]:
         """
         Build/rebuild the network graph from database.
 
+        The graph is loaded into a fresh instance that then replaces the
+        shared one in a single reference swap: readers holding the previous
+        graph keep a complete, consistent view and never wait on the build.
+        Use get_network_graph() afterwards to get the new instance.
+
         Returns stats about the built graph.
         """
-        with self._lock:
-            # Clear existing data
-            self.adjacency.clear()
-            self.switches.clear()
-            self.ports.clear()
-            self.core_switch_ids.clear()
-
-            # Load all switches
-            switches = db.query(Switch).all()
-            for sw in switches:
-                self.switches[sw.id] = {
-                    "id": sw.id,
-                    "hostname": sw.hostname,
-                    "ip_address": sw.ip_address,
-                    "site_code": self._extract_site_code(sw.hostname),
-                }
-                self.adjacency[sw.id] = {}
-
-            # Load all ports
-            ports = db.query(Port).all()
-            for port in ports:
-                self.ports[port.id] = {
-                    "id": port.id,
-                    "switch_id": port.switch_id,
-                    "port_name": port.port_name,
-                    "is_uplink": port.is_uplink,
-                }
-
-            # Load topology links and build bidirectional adjacency
-            links = db.query(TopologyLink).all()
-            for link in links:
-                # Ensure both switches exist in adjacency
-                if link.local_switch_id not in self.adjacency:
-                    self.adjacency[link.local_switch_id] = {}
-                if link.remote_switch_id not in self.adjacency:
-                    self.adjacency[link.remote_switch_id] = {}
-
-                # Add bidirectional edges
-                link_data = {
-                    "link_id": link.id,
-                    "local_port_id": link.local_port_id,
-                    "remote_port_id": link.remote_port_id,
-                    "protocol": link.protocol,
-                }
+        cls = type(self)
+        with cls._build_lock:
+            graph = cls()
+            graph._load(db)
+            with cls._lock:
+                current = cls._instance
+                graph.generation = max(self.generation, current.generation if current else 0) + 1
+                cls._instance = graph
+        return graph.get_stats()
+
+    def _load(self, db: Session) -> None:
+        """Populate this (unpublished) instance from the database."""
+        # Load all switches
+        switches = db.query(Switch).all()
+        for sw in switches:
+            self.switches[sw.id] = {
+                "id": sw.id,
+                "hostname": sw.hostname,
+                "ip_address": sw.ip_address,
+                "site_code": self._extract_site_code(sw.hostname),
+            }
+            self.adjacency[sw.id] = {}
+
+        # Load all ports
+        ports = db.query(Port).all()
+        for port in ports:
+            self.ports[port.id] = {
+                "id": port.id,
+                "switch_id": port.switch_id,
+                "port_name": port.port_name,
+                "is_uplink": port.is_uplink,
+            }
+
+        # Load topology links and build bidirectional adjacency
+        links = db.query(TopologyLink).all()
+        for link in links:
+            # Ensure both switches exist in adjacency
+            if link.local_switch_id not in self.adjacency:
+                self.adjacency[link.local_switch_id] = {}
+            if link.remote_switch_id not in self.adjacency:
+                self.adjacency[link.remote_switch_id] = {}
+
+            # Add bidirectional edges
+            link_data = {
+                "link_id": link.id,
+                "local_port_id": link.local_port_id,
+                "remote_port_id": link.remote_port_id,
+                "protocol": link.protocol,
+            }
+
+            self.adjacency[link.local_switch_id][link.remote_switch_id] = link_data
+            # Reverse direction
+            self.adjacency[link.remote_switch_id][link.local_switch_id] = {
+                "link_id": link.id,
+                "local_port_id": link.remote_port_id,
+                "remote_port_id": link.local_port_id,
+                "protocol": link.protocol,
+            }
+
+        # Identify core switches (top 5 by connectivity)
+        connectivity = [
+            (sw_id, len(neighbors))
+            for sw_id, neighbors in self.adjacency.items()
+        ]
+        connectivity.sort(key=lambda x: x[1], reverse=True)
+        self.core_switch_ids = [sw_id for sw_id, _ in connectivity[:5]]
+
+        # Dense indexes and the core switches' path trees
+        self._node_ids = list(self.adjacency)
+        self._node_index = {sw_id: i for i, sw_id in enumerate(self._node_ids)}
+        indptr = array("i", [0])
+        indices = array("i")
+        for sw_id in self._node_ids:
+            indices.extend(self._node_index[n] for n in self.adjacency[sw_id])
+            indptr.append(len(indices))
+        self._indptr = indptr
+        self._indices = indices
+        self._parent_trees = {}
+        for core_id in self.core_switch_ids:
+            self._bfs_parents(self._node_index[core_id])
 
-                self.adjacency[link.local_switch_id][link.remote_switch_id] = link_data
-                # Reverse direction
-                self.adjacency[link.remote_switch_id][link.local_switch_id] = {
-                    "link_id": link.id,
-                    "local_port_id": link.remote_port_id,
-                    "remote_port_id": link.local_port_id,
-                    "protocol": link.protocol,
-                }
+        self.core_switch_info = []
+        for core_id in self.core_switch_ids:
+            sw_info = self.switches.get(core_id, {})
+            self.core_switch_info.append({
+                "switch_id": core_id,
+                "hostname": sw_info.get("hostname", "Unknown"),
+                "ip_address": sw_info.get("ip_address", ""),
+                "neighbor_count": self.neighbor_count(core_id),
+            })
 
-            # Identify core switches (top 5 by connectivity)
-            connectivity = [
-                (sw_id, len(neighbors))
-                for sw_id, neighbors in self.adjacency.items()
-            ]
-            connectivity.sort(key=lambda x: x[1], reverse=True)
-            self.core_switch_ids = [sw_id for sw_id, _ in connectivity[:5]]
+        # Update metadata
+        self.node_count = len(self.switches)
+        self.edge_count = len(links)
+        self.built_at = datetime.utcnow()
+        self.is_valid = True
 
-            # Update metadata
-            self.node_count = len(self.switches)
-            self.edge_count = len(links)
-            self.built_at = datetime.utcnow()
-            self.is_valid = True
+    def schedule_rebuild(self, delay: float = REBUILD_DEBOUNCE_SECONDS) -> None:
+        """
+        Rebuild the graph in the background once changes settle.
 
-            return self.get_stats()
+        Each call restarts the countdown, so a burst of discoveries results
+        in a single rebuild. The rebuild uses its own database session.
+        """
+        with self._rebuild_lock:
+            if self._rebuild_timer is not None:
+                self._rebuild_timer.cancel()
+            self._start_rebuild_timer(delay)
+
+    def request_rebuild(self) -> None:
+        """Start a background rebuild now, unless one is already pending or running."""
+        with self._rebuild_lock:
+            if self._rebuild_timer is None:
+                self._start_rebuild_timer(0)
+
+    def _start_rebuild_timer(self, delay: float) -> None:
+        # Caller holds _rebuild_lock
+        timer = threading.Timer(delay, self._run_scheduled_rebuild)
+        timer.daemon = True
+        type(self)._rebuild_timer = timer
+        timer.start()
+
+    def _run_scheduled_rebuild(self) -> None:
+        from app.db.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            stats = self.build(db)
+            logger.info(f"Network graph rebuilt: {stats['node_count']} nodes, {stats['edge_count']} edges")
+        except Exception as e:
+            logger.error(f"Scheduled network graph rebuild failed: {e}")
+        finally:
+            db.close()
+            with self._rebuild_lock:
+                # Keep a newer timer scheduled while this rebuild was running
+                if self._rebuild_timer is threading.current_thread():
+                    type(self)._rebuild_timer = None
 
     def get_stats(self) -> Dict[str, Any]:
         """Get graph statistics."""
@@ -141,35 +242,126 @@ class NetworkGraph:
             "is_valid": self.is_valid,
         }
 
+    def _bfs_parents(self, source: int) -> array:
+        """Return the BFS parent tree rooted at a dense node index (memoized)."""
+        parents = self._parent_trees.get(source)
+        if parents is None:
+            parents = array("i", [-1]) * len(self._node_ids)
+            parents[source] = source
+            indptr = self._indptr
+            indices = self._indices
+            queue: deque = deque([source])
+
+            while queue:
+                current = queue.popleft()
+                for neighbor in indices[indptr[current]:indptr[current + 1]]:
+                    if parents[neighbor] < 0:
+                        parents[neighbor] = current
+                        queue.append(neighbor)
+
+            self._parent_trees[source] = parents
+        return parents
+
     def find_path(self, from_switch_id: int, to_switch_id: int) -> Optional[List[int]]:
         """
-        Find shortest path between two switches using BFS.
+        Find shortest path between two switches.
 
         Returns list of switch IDs from start to end, or None if no path.
         """
-        if from_switch_id not in self.adjacency or to_switch_id not in self.adjacency:
+        source = self._node_index.get(from_switch_id)
+        target = self._node_index.get(to_switch_id)
+        if source is None or target is None:
             return None
 
-        if from_switch_id == to_switch_id:
+        if source == target:
             return [from_switch_id]
 
-        # BFS
-        visited: Set[int] = {from_switch_id}
-        queue: deque = deque([(from_switch_id, [from_switch_id])])
+        parents = self._parent_trees.get(source)
+        if parents is not None:
+            path = self._walk_tree(parents, target)
+            if path:
+                path.reverse()
+        else:
+            parents = self._parent_trees.get(target)
+            if parents is not None:
+                path = self._walk_tree(parents, source)
+            else:
+                path = self._bidirectional_search(source, target)
+
+        if not path:
+            return None
+        return [self._node_ids[i] for i in path]
 
-        while queue:
-            current, path = queue.popleft()
+    @staticmethod
+    def _walk_tree(parents: array, node: int) -> Optional[List[int]]:
+        """Follow a parent tree from node up to its root (node first)."""
+        if parents[node] < 0:
+            return None
+        path = [node]
+        while parents[node] != node:
+            node = parents[node]
+            path.append(node)
+        return path
+
+    def _bidirectional_search(self, source: int, target: int) -> Optional[List[int]]:
+        """Shortest path between two dense indexes, searching from both ends."""
+        indptr = self._indptr
+        indices = self._indices
+        pred_fwd: Dict[int, int] = {source: source}
+        pred_bwd: Dict[int, int] = {target: target}
+        frontier_fwd = [source]
+        frontier_bwd = [target]
+
+        while frontier_fwd and frontier_bwd:
+            # Expand the smaller frontier one full level
+            forward = len(frontier_fwd) <= len(frontier_bwd)
+            if forward:
+                frontier, pred, other = frontier_fwd, pred_fwd, pred_bwd
+            else:
+                frontier, pred, other = frontier_bwd, pred_bwd, pred_fwd
+
+            next_frontier = []
+            meet = None
+            for current in frontier:
+                for neighbor in indices[indptr[current]:indptr[current + 1]]:
+                    if neighbor in pred:
+                        continue
+                    pred[neighbor] = current
+                    if neighbor in other:
+                        meet = neighbor
+                        break
+                    next_frontier.append(neighbor)
+                if meet is not None:
+                    break
 
-            for neighbor_id in self.adjacency.get(current, {}).keys():
-                if neighbor_id == to_switch_id:
-                    return path + [neighbor_id]
+            if meet is not None:
+                path = self._walk_tree_dict(pred_fwd, meet)
+                path.reverse()
+                path.extend(self._walk_tree_dict(pred_bwd, meet)[1:])
+                return path
 
-                if neighbor_id not in visited:
-                    visited.add(neighbor_id)
-                    queue.append((neighbor_id, path + [neighbor_id]))
+            if forward:
+                frontier_fwd = next_frontier
+            else:
+                frontier_bwd = next_frontier
 
         return None
 
+    @staticmethod
+    def _walk_tree_dict(pred: Dict[int, int], node: int) -> List[int]:
+        path = [node]
+        while pred[node] != node:
+            node = pred[node]
+            path.append(node)
+        return path
+
+    def neighbor_count(self, switch_id: int) -> int:
+        """Number of switches directly linked to a switch."""
+        i = self._node_index.get(switch_id)
+        if i is None:
+            return 0
+        return self._indptr[i + 1] - self._indptr[i]
+
     def find_path_to_core(self, switch_id: int) -> Optional[List[int]]:
         """
         Find path from a switch to the nearest core switch.
@@ -199,44 +391,30 @@ class NetworkGraph:
         # Normalize MAC
         mac_normalized = mac_address.upper().replace('-', ':')
 
-        # Find MAC in database
-        mac = db.query(MacAddress).filter(MacAddress.mac_address == mac_normalized).first()
-        if not mac:
+        # MAC, current location, switch and port in one query; the path
+        # itself is then reconstructed from memory only
+        row = (
+            db.query(
+                MacAddress.vendor_name,
+                MacLocation.ip_address,
+                MacLocation.switch_id,
+                Switch.hostname,
+                Port.port_name,
+            )
+            .join(MacLocation, MacLocation.mac_id == MacAddress.id)
+            .outerjoin(Switch, Switch.id == MacLocation.switch_id)
+            .outerjoin(Port, Port.id == MacLocation.port_id)
+            .filter(
+                MacAddress.mac_address == mac_normalized,
+                MacLocation.is_current == True,
+            )
+            .first()
+        )
+
+        if not row:
             return None
 
-        # Get current location
-        location = db.query(MacLocation).filter(
-            MacLocation.mac_id == mac.id,
-            MacLocation.is_current == True
-        ).first()
-
-        if not location:
-            return None
-
-        endpoint_switch_id = location.switch_id
-        endpoint_port_id = location.port_id
-
-        # Get endpoint switch info
-        endpoint_switch = self.switches.get(endpoint_switch_id)
-        if not endpoint_switch:
-            # Switch not in graph - try to load
-            sw = db.query(Switch).filter(Switch.id == endpoint_switch_id).first()
-            if sw:
-                endpoint_switch = {
-                    "id": sw.id,
-                    "hostname": sw.hostname,
-                    "ip_address": sw.ip_address,
-                }
-
-        # Get endpoint port info
-        endpoint_port = self.ports.get(endpoint_port_id)
-        if not endpoint_port:
-            port = db.query(Port).filter(Port.id == endpoint_port_id).first()
-            if port:
-                endpoint_port = {
-                    "id": port.id,
-                    "port_name": port.port_name,
-                }
+        endpoint_switch_id = row.switch_id
 
         # Find path from core to endpoint
         path_switch_ids: List[int] = []
@@ -264,6 +442,7 @@ class NetworkGraph:
                     "switch_id": sw_id,
                     "hostname": sw_info.get("hostname", "Unknown"),
                     "ip_address": sw_info.get("ip_address", ""),
+                    "port_name": None,
                     "is_endpoint": sw_id == endpoint_switch_id,
                 }
 
@@ -283,11 +462,11 @@ class NetworkGraph:
 
         return {
             "mac_address": mac_normalized,
-            "ip_address": location.ip_address,
-            "vendor_name": mac.vendor_name,
+            "ip_address": row.ip_address,
+            "vendor_name": row.vendor_name,
             "endpoint_switch_id": endpoint_switch_id,
-            "endpoint_switch_hostname": endpoint_switch.get("hostname", "Unknown") if endpoint_switch else "Unknown",
-            "endpoint_port": endpoint_port.get("port_name", "Unknown") if endpoint_port else "Unknown",
+            "endpoint_switch_hostname": row.hostname or "Unknown",
+            "endpoint_port": row.port_name or "Unknown",
             "path": path_details,
             "path_node_ids": path_switch_ids,
             "path_edge_keys": edge_keys,
@@ -319,7 +498,11 @@ class NetworkGraph:
         return None
 
 
+# Created at import so the per-request accessor is a plain attribute read
+NetworkGraph._instance = NetworkGraph()
+
+
 # Singleton accessor
 def get_network_graph() -> NetworkGraph:
-    """Get the global network graph instance."""
-    return NetworkGraph.get_instance()
+    """Get the global network graph instance (the live one after each rebuild swap)."""
+    return NetworkGraph._instance
@@ -0,0 +1,37 @@
+"""MAC address classification utilities.
+
+The first octet of a MAC address carries two flag bits:
+- bit 0 (I/G): set for group (multicast/broadcast) addresses
+- bit 1 (U/L): set for locally administered (randomized) addresses
+
+The class is computed once when a MAC is stored (see MacAddress.mac_class)
+so dashboard queries can group on an indexed column.
+"""
+
+MAC_CLASS_REAL = 0
+MAC_CLASS_RANDOM = 1
+MAC_CLASS_MULTICAST = 2
+
+# SQL equivalent of classify_mac over the mac_address column, for backfills.
+# It reads the low hex digit of the first octet: odd = multicast,
+# 2/6/A/E = locally administered.
+MAC_CLASS_SQL_CASE = (
+    "CASE"
+    f" WHEN upper(substr(mac_address, 2, 1)) IN ('1','3','5','7','9','B','D','F') THEN {MAC_CLASS_MULTICAST}"
+    f" WHEN upper(substr(mac_address, 2, 1)) IN ('2','6','A','E') THEN {MAC_CLASS_RANDOM}"
+    f" ELSE {MAC_CLASS_REAL} END"
+)
+
+
+def classify_mac(mac_address: str) -> int:
+    """Return the MAC_CLASS_* value for a MAC address (XX:XX:XX:XX:XX:XX)."""
+    try:
+        first_octet = int(mac_address[0:2], 16)
+    except (TypeError, ValueError):
+        return MAC_CLASS_REAL
+
+    if first_octet & 0x1:
+        return MAC_CLASS_MULTICAST
+    if first_octet & 0x2:
+        return MAC_CLASS_RANDOM
+    return MAC_CLASS_REAL
@@ -0,0 +1,58 @@
+"""orjson-backed JSON response class.
+
+FastAPI's default JSONResponse serializes through the stdlib ``json`` module.
+This response renders with orjson instead, which natively handles datetime,
+UUID and dataclass values and is considerably faster on large list payloads.
+"""
+from typing import Any, AsyncIterator, Iterable
+
+import orjson
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    """Fallback encoder for types orjson does not serialize natively."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _dumps(content: Any) -> bytes:
+    return orjson.dumps(
+        content,
+        default=_default,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z,
+    )
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return _dumps(content)
+
+
+async def _iter_json_array(items: Iterable[Any]) -> AsyncIterator[bytes]:
+    yield b"["
+    first = True
+    for item in items:
+        if first:
+            first = False
+            yield _dumps(item)
+        else:
+            yield b"," + _dumps(item)
+    yield b"]"
+
+
+def orjson_array_stream(items: Iterable[Any]) -> StreamingResponse:
+    """Stream ``items`` as a JSON array, encoding one element per chunk.
+
+    The full JSON document is never held in memory at once, and the client
+    can start parsing before the last element is encoded.
+    """
+    return StreamingResponse(_iter_json_array(items), media_type="application/json")
@@ -0,0 +1,118 @@
+"""
+Test suite per la paginazione degli alert.
+Verifica che GET /api/alerts scorra tutti gli alert con next_cursor
+e che skip non venga combinato con il cursore.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.db.database import Base, get_db
+from app.db.models import Alert
+
+
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    """Override database dependency for testing."""
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(autouse=True)
+def setup_database():
+    """Create tables before each test and drop after."""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def client():
+    """Test client bound to this module's database."""
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    if previous is None:
+        app.dependency_overrides.pop(get_db, None)
+    else:
+        app.dependency_overrides[get_db] = previous
+
+
+@pytest.fixture
+def alerts():
+    """25 alerts; pairs share created_at so the id breaks the tie."""
+    db = TestingSessionLocal()
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    db.add_all([
+        Alert(
+            alert_type="new_mac",
+            message=f"Alert {i}",
+            severity="info",
+            is_read=(i % 3 == 0),
+            created_at=base + timedelta(minutes=i // 2),
+        )
+        for i in range(25)
+    ])
+    db.commit()
+    ids = [
+        a.id for a in db.query(Alert).order_by(Alert.created_at.desc(), Alert.id.desc())
+    ]
+    db.close()
+    return ids
+
+
+class TestAlertKeysetPagination:
+    """Paginazione con cursore (created_at, id)."""
+
+    def test_pages_through_all_alerts_with_next_cursor(self, client, alerts):
+        seen = []
+        params = {"limit": 7}
+        while True:
+            response = client.get("/api/alerts", params=params)
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total"] == 25
+            seen.extend(item["id"] for item in data["items"])
+            if data["next_cursor"] is None:
+                break
+            params = {"limit": 7, **data["next_cursor"]}
+
+        assert seen == alerts
+
+    def test_cursor_matches_offset_page(self, client, alerts):
+        first = client.get("/api/alerts", params={"limit": 10}).json()
+        second = client.get("/api/alerts", params={"limit": 10, **first["next_cursor"]}).json()
+        by_offset = client.get("/api/alerts", params={"limit": 10, "skip": 10}).json()
+        assert [a["id"] for a in second["items"]] == [a["id"] for a in by_offset["items"]]
+
+    def test_last_full_page_cursor_returns_empty_page(self, client, alerts):
+        first = client.get("/api/alerts", params={"limit": 25}).json()
+        assert len(first["items"]) == 25
+        rest = client.get("/api/alerts", params={"limit": 25, **first["next_cursor"]}).json()
+        assert rest["items"] == []
+        assert rest["next_cursor"] is None
+        assert rest["total"] == 25
+
+    def test_skip_with_cursor_is_rejected(self, client, alerts):
+        first = client.get("/api/alerts", params={"limit": 5}).json()
+        response = client.get("/api/alerts", params={"limit": 5, "skip": 5, **first["next_cursor"]})
+        assert response.status_code == 422
+
+    def test_partial_cursor_is_rejected(self, client, alerts):
+        response = client.get("/api/alerts", params={"after_id": alerts[3]})
+        assert response.status_code == 422
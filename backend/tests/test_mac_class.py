@@ -0,0 +1,56 @@
+"""
+Test suite per la classificazione dei MAC address.
+Verifica che classify_mac e il CASE SQL usato dalla migrazione di
+mac_class diano la stessa classe per ogni primo ottetto.
+"""
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.utils.mac_utils import (
+    MAC_CLASS_MULTICAST,
+    MAC_CLASS_RANDOM,
+    MAC_CLASS_REAL,
+    MAC_CLASS_SQL_CASE,
+    classify_mac,
+)
+
+
+@pytest.fixture(scope="module")
+def conn():
+    """SQLite connection with a bare mac_addresses table."""
+    engine = create_engine("sqlite:///:memory:")
+    with engine.connect() as connection:
+        connection.execute(text("CREATE TABLE mac_addresses (mac_address VARCHAR(17))"))
+        yield connection
+
+
+def sql_class(conn, mac_address: str) -> int:
+    conn.execute(text("DELETE FROM mac_addresses"))
+    conn.execute(text("INSERT INTO mac_addresses VALUES (:mac)"), {"mac": mac_address})
+    return conn.execute(text(f"SELECT {MAC_CLASS_SQL_CASE} FROM mac_addresses")).scalar()
+
+
+@pytest.mark.parametrize("mac_address, expected", [
+    # Multicast / broadcast: I/G bit set
+    ("01:00:5E:00:00:01", MAC_CLASS_MULTICAST),
+    ("33:33:00:00:00:01", MAC_CLASS_MULTICAST),
+    ("FF:FF:FF:FF:FF:FF", MAC_CLASS_MULTICAST),
+    ("03:00:00:00:00:01", MAC_CLASS_MULTICAST),  # Both bits set: multicast wins
+    # Locally administered (randomized)
+    ("02:00:00:00:00:01", MAC_CLASS_RANDOM),
+    ("DA:A1:19:00:00:01", MAC_CLASS_RANDOM),
+    ("fe:12:34:56:78:9a", MAC_CLASS_RANDOM),
+    # Universally administered
+    ("00:1A:2B:3C:4D:5E", MAC_CLASS_REAL),
+    ("3c:22:fb:00:00:01", MAC_CLASS_REAL),
+    ("AC:DE:48:00:11:22", MAC_CLASS_REAL),
+])
+def test_classify_mac_and_sql_agree(conn, mac_address, expected):
+    assert classify_mac(mac_address) == expected
+    assert sql_class(conn, mac_address) == expected
+
+
+def test_every_first_octet_agrees(conn):
+    for octet in range(256):
+        for mac_address in (f"{octet:02X}:00:00:00:00:01", f"{octet:02x}:00:00:00:00:01"):
+            assert sql_class(conn, mac_address) == classify_mac(mac_address), mac_address
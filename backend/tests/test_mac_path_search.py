@@ -0,0 +1,131 @@
+"""
+Test suite per la ricerca del percorso MAC verso il core.
+Confronta la ricerca bidirezionale di _LinkGraph con una BFS semplice
+su piccole topologie fisse.
+"""
+import random
+from collections import deque, namedtuple
+
+import pytest
+
+from app.api.mac_path import _LinkGraph
+
+
+Link = namedtuple("Link", "id local_switch_id remote_switch_id local_port_id")
+
+
+def make_graph(edges):
+    """Build a _LinkGraph from (switch, switch) pairs; port id = 1000 + link id."""
+    return _LinkGraph([Link(i, a, b, 1000 + i) for i, (a, b) in enumerate(edges, start=1)])
+
+
+def bfs_distances(edges, source):
+    """Hop count from source to every reachable switch (reference BFS)."""
+    adjacency = {}
+    for a, b in edges:
+        adjacency.setdefault(a, []).append(b)
+        adjacency.setdefault(b, []).append(a)
+    dist = {source: 0}
+    queue = deque([source])
+    while queue:
+        current = queue.popleft()
+        for neighbor in adjacency.get(current, []):
+            if neighbor not in dist:
+                dist[neighbor] = dist[current] + 1
+                queue.append(neighbor)
+    return dist
+
+
+def assert_valid_path(edges, switches, links, core, endpoint):
+    """switches goes core -> endpoint and links[i] joins switches[i], switches[i + 1]."""
+    assert switches[0] == core
+    assert switches[-1] == endpoint
+    assert len(links) == len(switches) - 1
+    for i, link in enumerate(links):
+        assert {link.local_switch_id, link.remote_switch_id} == {switches[i], switches[i + 1]}
+        assert (link.local_switch_id, link.remote_switch_id) == edges[link.id - 1]
+    assert len(set(switches)) == len(switches)
+
+
+class TestCorePathFixedTopologies:
+    """Percorsi verso il core su topologie note."""
+
+    def test_chain_to_core(self):
+        edges = [(1, 2), (2, 3), (3, 4)]
+        switches, links = make_graph(edges).core_path(4, frozenset({1}))
+        assert switches == (1, 2, 3, 4)
+        assert [link.id for link in links] == [1, 2, 3]
+
+    def test_nearest_of_several_cores(self):
+        # Core 1 is three hops away from 5, core 7 only two
+        edges = [(1, 2), (2, 3), (3, 5), (5, 6), (6, 7)]
+        switches, links = make_graph(edges).core_path(5, frozenset({1, 7}))
+        assert switches == (7, 6, 5)
+        assert_valid_path(edges, switches, links, 7, 5)
+
+    def test_endpoint_is_core(self):
+        edges = [(1, 2), (2, 3)]
+        assert make_graph(edges).core_path(2, frozenset({2, 1})) == ((2,), ())
+
+    def test_endpoint_adjacent_to_core(self):
+        edges = [(1, 2), (2, 3)]
+        switches, links = make_graph(edges).core_path(2, frozenset({3}))
+        assert switches == (3, 2)
+        assert [link.id for link in links] == [2]
+
+    def test_isolated_endpoint(self):
+        edges = [(1, 2)]
+        assert make_graph(edges).core_path(9, frozenset({1})) == ((9,), ())
+
+    def test_core_in_other_component_falls_back_to_degree(self):
+        # Core 10 is unreachable: the hub 2 of the endpoint's component wins
+        edges = [(1, 2), (2, 3), (2, 4), (10, 11)]
+        switches, links = make_graph(edges).core_path(4, frozenset({10}))
+        assert switches == (2, 4)
+        assert_valid_path(edges, switches, links, 2, 4)
+
+    def test_no_core_tier_falls_back_to_degree(self):
+        edges = [(1, 2), (2, 3), (2, 4), (4, 5)]
+        switches, links = make_graph(edges).core_path(5, frozenset())
+        assert switches == (2, 4, 5)
+        assert_valid_path(edges, switches, links, 2, 5)
+
+    def test_cycle_takes_shortest_side(self):
+        edges = [(1, 2), (2, 3), (3, 4), (4, 5), (5, 6), (6, 1)]
+        switches, links = make_graph(edges).core_path(5, frozenset({1}))
+        assert switches == (1, 6, 5)
+        assert_valid_path(edges, switches, links, 1, 5)
+
+    def test_paths_are_memoized(self):
+        graph = make_graph([(1, 2), (2, 3)])
+        first = graph.core_path(3, frozenset({1}))
+        assert graph.core_path(3, frozenset({1})) is first
+        assert graph.core_path(3, frozenset({2})) != first
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_search_to_cores_matches_bfs(seed):
+    """On random graphs the path reaches a nearest core over real links."""
+    rng = random.Random(seed)
+    n = rng.randint(2, 30)
+    edges = [(rng.randrange(1, i), i) for i in range(2, n + 1) if rng.random() < 0.9]
+    edges += [tuple(rng.sample(range(1, n + 1), 2)) for _ in range(rng.randint(0, n))]
+    graph = make_graph(edges)
+    cores = frozenset(rng.sample(range(1, n + 1), rng.randint(1, 3)))
+
+    for endpoint in graph.node_ids:
+        dist = bfs_distances(edges, endpoint)
+        reachable_cores = [core for core in cores if core in dist]
+        switches, links = graph.core_path(endpoint, cores)
+        if endpoint in cores:
+            assert (switches, links) == ((endpoint,), ())
+        elif reachable_cores:
+            assert switches[0] in cores
+            assert len(links) == min(dist[core] for core in reachable_cores)
+            assert_valid_path(edges, switches, links, switches[0], endpoint)
+        else:
+            # Fallback: BFS tree path to the best-connected reachable switch
+            assert switches[0] not in cores
+            assert len(links) == dist[switches[0]]
+            if links:
+                assert_valid_path(edges, switches, links, switches[0], endpoint)